@@ -2,17 +2,34 @@
 Main FastAPI application entry point.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 # Import routes
 from app.routes import health, game, negotiation, config
 
 # Import services to initialize them
-from app.services.ai_client import openai_client, deepseek_client, ai_provider
+from app.services.ai_client import openai_client, deepseek_client, ai_provider, close_ai_clients
 from app.services.config_service import load_negotiation_config
 
-app = FastAPI(title="Fashion Supply Chain", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing to start; on shutdown close the AI clients' shared connection pool
+    yield
+    await close_ai_clients()
+
+
+# Serialize responses with orjson instead of the stdlib json encoder
+app = FastAPI(
+    title="Fashion Supply Chain",
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,4 +47,19 @@ app.include_router(config.router)
 
 # Load config on startup
 load_negotiation_config()
-    
\ No newline at end of file
+    
+
+
+if __name__ == "__main__":
+    import sys
+    import uvicorn
+
+    # uvloop + httptools ship with uvicorn[standard]; uvloop does not support Windows.
+    # Single worker only: SESSIONS lives in this process's memory.
+    uvicorn.run(
+        "app.main:app",
+        host="127.0.0.1",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+    )
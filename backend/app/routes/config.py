@@ -3,9 +3,8 @@ Configuration management routes.
 """
 
 from pathlib import Path
-import json
-import csv
-from fastapi import APIRouter, HTTPException
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Response
 
 from app.schemas import (
     ConfigStateResponse,
@@ -16,16 +15,18 @@ from app.schemas import (
 from app.services.game_service import build_config_state_response
 from app.services.config_service import (
     load_negotiation_config,
-    reload_negotiation_config,
+    remember_negotiation_config,
     DEFAULT_NEGOTIATION_CONFIG_PATH,
 )
+from app.utils.request_helpers import json_body, json_body_openapi
+from app.utils.response_helpers import model_response
 from simulation.core import reload_defaults
 
 router = APIRouter()
 
 
 @router.get("/config/current", response_model=ConfigStateResponse)
-def get_config() -> ConfigStateResponse:
+async def get_config() -> Response:
     """
     Returns the current configuration state (economic parameters, demand history, negotiation config).
     
@@ -43,68 +44,85 @@ def get_config() -> ConfigStateResponse:
         Called by frontend to display current configuration to instructor.
         Used to load configuration into the UI for viewing and editing.
     """
-    return build_config_state_response()
+    return model_response(build_config_state_response())
 
 
-@router.post("/config/update", response_model=ConfigStateResponse)
-def update_config(request: UpdateConfigRequest) -> ConfigStateResponse:
+def _write_config_files(request: UpdateConfigRequest) -> None:
     """
-    Updates economic parameters and/or demand history.
+    Writes updated economic parameters and/or demand history to disk and reloads them.
     
     Inputs:
-        request: UpdateConfigRequest containing:
-            - Optional economic parameters (retail_price, costs, salvage values, etc.)
-            - Optional demand_history list
+        request: UpdateConfigRequest with optional economic_params and history.
     
     What happens:
-        If economic parameters provided: updates them and saves to economic_params.json file.
-        If demand history provided: updates it and saves to D_hist.csv file.
-        Reloads the configuration so changes take effect immediately.
-        Updates global configuration state.
+        If economic parameters provided: saves them to economic_params.json file.
+        If demand history provided: saves it to D_hist.csv file.
+        Reloads defaults from disk so new games use these values.
     
     Output:
-        Returns a ConfigStateResponse with the updated configuration.
+        None (writes files and updates global configuration state).
     
     Context:
-        Called by instructor to modify game parameters.
-        Changes affect all future games and negotiations.
-        Used to customize the simulation environment.
+        Blocking file I/O - called by update_config() through anyio.to_thread.run_sync
+        so other requests are not stalled while the files are written.
     """
     # Update economic params JSON if provided
     if request.economic_params is not None:
         econ = request.economic_params
         econ_path = Path("config/economic_params.json")
         econ_path.parent.mkdir(parents=True, exist_ok=True)
-        econ_data = {
-            "retail_price": econ.retail_price,
-            "buyer_salvage_value": econ.buyer_salvage_value,
-            "supplier_salvage_value": econ.supplier_salvage_value,
-            "supplier_cost": econ.supplier_cost,
-            "return_shipping_buyer": econ.return_shipping_buyer,
-            "return_handling_supplier": econ.return_handling_supplier,
-        }
-        econ_path.write_text(json.dumps(econ_data, indent=2))
+        # Serialize straight from the schema (same field names as economic_params.json)
+        econ_path.write_text(econ.model_dump_json(indent=2))
 
     # Update history CSV if provided
     if request.history is not None:
         hist = request.history
         hist_path = Path("data/D_hist.csv")
         hist_path.parent.mkdir(parents=True, exist_ok=True)
-        with hist_path.open("w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["demand"])
-            for val in hist:
-                writer.writerow([int(val)])
+        # Single-column CSV: build the whole file once and write it in one call
+        hist_path.write_text("demand\n" + "".join(f"{int(val)}\n" for val in hist))
 
     # Reload defaults from disk so new games use these values
     reload_defaults()
 
+
+@router.post(
+    "/config/update",
+    response_model=ConfigStateResponse,
+    openapi_extra=json_body_openapi(UpdateConfigRequest),
+)
+async def update_config(request: UpdateConfigRequest = Depends(json_body(UpdateConfigRequest))) -> Response:
+    """
+    Updates economic parameters and/or demand history.
+    
+    Inputs:
+        request: UpdateConfigRequest containing:
+            - Optional economic parameters (retail_price, costs, salvage values, etc.)
+            - Optional demand_history list
+    
+    What happens:
+        If economic parameters provided: updates them and saves to economic_params.json file.
+        If demand history provided: updates it and saves to D_hist.csv file.
+        Reloads the configuration so changes take effect immediately.
+        Updates global configuration state.
+    
+    Output:
+        Returns a ConfigStateResponse with the updated configuration.
+    
+    Context:
+        Called by instructor to modify game parameters.
+        Changes affect all future games and negotiations.
+        Used to customize the simulation environment.
+    """
+    # Disk writes and the reload run in a worker thread so the event loop stays free
+    await anyio.to_thread.run_sync(_write_config_files, request)
+
     # Return the new config state
-    return build_config_state_response()
+    return model_response(build_config_state_response())
 
 
 @router.get("/config/negotiation", response_model=NegotiationConfigResponse)
-def get_negotiation_config() -> NegotiationConfigResponse:
+async def get_negotiation_config() -> Response:
     """
     Returns the current negotiation configuration.
     
@@ -123,11 +141,17 @@ def get_negotiation_config() -> NegotiationConfigResponse:
         Used to load configuration for viewing and editing.
     """
     config = load_negotiation_config()
-    return NegotiationConfigResponse(negotiation_config=config)
+    return model_response(NegotiationConfigResponse(negotiation_config=config))
 
 
-@router.post("/config/negotiation/update", response_model=NegotiationConfigResponse)
-def update_negotiation_config(request: UpdateNegotiationConfigRequest) -> NegotiationConfigResponse:
+@router.post(
+    "/config/negotiation/update",
+    response_model=NegotiationConfigResponse,
+    openapi_extra=json_body_openapi(UpdateNegotiationConfigRequest),
+)
+def update_negotiation_config(
+    request: UpdateNegotiationConfigRequest = Depends(json_body(UpdateNegotiationConfigRequest)),
+) -> Response:
     """
     Updates the negotiation configuration settings.
     
@@ -143,10 +167,9 @@ def update_negotiation_config(request: UpdateNegotiationConfigRequest) -> Negoti
             - example_dialog: Example conversation for AI
     
     What happens:
-        Validates all configuration values are reasonable and consistent.
+        Configuration values are validated by NegotiationConfigData while parsing the body.
         Saves the configuration to negotiation_config.json file.
-        Reloads the configuration so changes take effect immediately.
-        Updates the cached config in memory.
+        Stores the validated config as the cached one so changes take effect immediately.
     
     Output:
         Returns a NegotiationConfigResponse with the updated configuration.
@@ -161,36 +184,14 @@ def update_negotiation_config(request: UpdateNegotiationConfigRequest) -> Negoti
     
     config = request.negotiation_config
     
-    # Validate config
-    if config.length_min < 1:
-        raise HTTPException(status_code=400, detail="length_min must be at least 1")
-    if config.length_max < config.length_min:
-        raise HTTPException(status_code=400, detail="length_max must be >= length_min")
-    if config.cap_type_allowed not in ("fraction", "unit", "both"):
-        raise HTTPException(status_code=400, detail="cap_type_allowed must be 'fraction', 'unit', or 'both'")
-    if config.cap_value_min < 0:
-        raise HTTPException(status_code=400, detail="cap_value_min must be >= 0")
-    if config.cap_value_max < config.cap_value_min:
-        raise HTTPException(status_code=400, detail="cap_value_max must be >= cap_value_min")
-    if config.revenue_share_min < 0 or config.revenue_share_min > 1:
-        raise HTTPException(status_code=400, detail="revenue_share_min must be between 0 and 1")
-    if config.revenue_share_max < config.revenue_share_min or config.revenue_share_max > 1:
-        raise HTTPException(status_code=400, detail="revenue_share_max must be between revenue_share_min and 1")
-    if not config.contract_types_available:
-        raise HTTPException(status_code=400, detail="At least one contract type must be available")
-    for ct in config.contract_types_available:
-        if ct not in ("buyback", "revenue_sharing", "hybrid"):
-            raise HTTPException(status_code=400, detail=f"Invalid contract type: {ct}")
-    
     # Save to file
     config_path = DEFAULT_NEGOTIATION_CONFIG_PATH
     config_path.parent.mkdir(parents=True, exist_ok=True)
     
-    config_dict = config.model_dump()
-    config_path.write_text(json.dumps(config_dict, indent=2))
+    config_path.write_text(config.model_dump_json(indent=2), encoding="utf-8")
     
-    # Reload in-memory config
-    reload_negotiation_config()
+    # The saved config becomes the cached one (no need to read the file back)
+    remember_negotiation_config(config)
     
-    return NegotiationConfigResponse(negotiation_config=load_negotiation_config())
+    return model_response(NegotiationConfigResponse(negotiation_config=config))
 
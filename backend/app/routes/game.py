@@ -3,40 +3,46 @@ Game management routes.
 """
 
 from uuid import uuid4
-from typing import Dict, Any
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 
 from simulation.core import (
     GameState,
     Contract,
-    DEFAULT_HISTORY,
+    get_current_history,
     simulate_game_round,
 )
 from app.schemas import (
     GameStartRequest,
     GameStartResponse,
+    EndGameResponse,
     GameStateRequest,
     GameStateResponse,
     OrderRequest,
     OrderResponse,
     GameSummary,
     RoundSummaryData,
-    NegotiationHistory,
 )
 from app.services.game_service import (
-    is_game_over,
+    save_ongoing_negotiation,
+    to_historical_demands_data,
     to_game_state_response,
+    to_game_state_delta_response,
     to_round_output_data,
-    to_round_summary_data,
-    to_contract_data,
+    get_round_summaries_data,
 )
 from app.services.state import SESSIONS
+from app.utils.request_helpers import json_body, json_body_openapi
+from app.utils.response_helpers import model_response
 
 router = APIRouter()
 
 
-@router.post("/game/start", response_model=GameStartResponse)
-def start_game(request: GameStartRequest) -> GameStartResponse:
+@router.post(
+    "/game/start",
+    response_model=GameStartResponse,
+    openapi_extra=json_body_openapi(GameStartRequest),
+)
+def start_game(request: GameStartRequest = Depends(json_body(GameStartRequest))) -> Response:
     """
     Starts a new game session with specified parameters.
     
@@ -49,7 +55,7 @@ def start_game(request: GameStartRequest) -> GameStartResponse:
         Validates the demand method is valid.
         Creates a new unique session ID.
         Creates an empty temporary contract (no active contract initially).
-        Loads default demand history.
+        Shares the current default demand history (copied lazily once rounds are simulated).
         Initializes a new GameState with round 1, empty profits, and default settings.
         Stores the game state in the SESSIONS dictionary.
         Initializes negotiation state (empty chat history, no draft contract).
@@ -83,8 +89,8 @@ def start_game(request: GameStartRequest) -> GameStartResponse:
         revenue_share=0.0,
     )
 
-    # per-session copy (updates list on simulated rounds)
-    history = list(DEFAULT_HISTORY)
+    # shared read-only default history; simulate_game_round copies it on the first round
+    history = get_current_history()
 
     # initial game state
     state = GameState(
@@ -102,13 +108,17 @@ def start_game(request: GameStartRequest) -> GameStartResponse:
     SESSIONS[session_id] = state
 
     # return response to frontend
-    return GameStartResponse(
+    return model_response(GameStartResponse.model_construct(
         state=to_game_state_response(session_id, state)
-    )
+    ))
 
 
-@router.post("/game/state", response_model=GameStateResponse)
-def get_game_state(request: GameStateRequest) -> GameStateResponse:
+@router.post(
+    "/game/state",
+    response_model=GameStateResponse,
+    openapi_extra=json_body_openapi(GameStateRequest),
+)
+async def get_game_state(request: GameStateRequest = Depends(json_body(GameStateRequest))) -> Response:
     """
     Retrieves the current game state for a session.
     
@@ -137,15 +147,20 @@ def get_game_state(request: GameStateRequest) -> GameStateResponse:
     """
     session_id = request.session_id
 
-    state = SESSIONS.get(session_id)
-    if state is None:
+    try:
+        state = SESSIONS[session_id]
+    except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    return to_game_state_response(session_id, state)
+    return model_response(to_game_state_response(session_id, state))
 
 
-@router.post("/game/order", response_model=OrderResponse)
-def place_order(request: OrderRequest) -> OrderResponse:
+@router.post(
+    "/game/order",
+    response_model=OrderResponse,
+    openapi_extra=json_body_openapi(OrderRequest),
+)
+async def place_order(request: OrderRequest = Depends(json_body(OrderRequest))) -> Response:
     """
     Processes an order from the student and simulates one round of the game.
     
@@ -153,6 +168,7 @@ def place_order(request: OrderRequest) -> OrderResponse:
         request: OrderRequest containing:
             - session_id: Game session identifier
             - order_quantity: Number of units the student wants to order
+            - include_components: Optional, also return the detailed revenue/cost breakdown
     
     What happens:
         Looks up the game session.
@@ -160,14 +176,14 @@ def place_order(request: OrderRequest) -> OrderResponse:
         Checks if there's an active contract (raises error if not).
         Calls simulate_game_round with the order quantity.
         The simulation calculates demand, sales, returns, profits based on the contract.
-        Updates the game state with new round results.
-        Stores the updated state back in SESSIONS.
+        Updates the stored game state in place with new round results.
         Creates a round summary for logging.
     
     Output:
         Returns an OrderResponse containing:
-        - Updated game state (with new round, updated profits, etc.)
-        - Round output data (demand, sales, returns, profits for this round)
+        - Updated game state as a GameStateDeltaResponse (new round, updated profits, latest round summary)
+        - Round output data (demand, sales, returns, profits for this round;
+          components only if include_components was set)
     
     Context:
         Called when student places an order during an active contract.
@@ -175,12 +191,13 @@ def place_order(request: OrderRequest) -> OrderResponse:
         Can only be called when there's an active contract with remaining rounds.
     """
     session_id = request.session_id
-    state = SESSIONS.get(session_id)
-    if state is None:
+    try:
+        state = SESSIONS[session_id]
+    except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # 1) Check round limit FIRST (true game over)
-    if is_game_over(state):
+    if state.game_over:
         raise HTTPException(
             status_code=400,
             detail="Game is over. Start a new game.",
@@ -193,22 +210,20 @@ def place_order(request: OrderRequest) -> OrderResponse:
             detail="No active contract. Negotiate terms before ordering.",
         )
 
-    # 3) Only then simulate a new round
-    round_output, new_state = simulate_game_round(
+    # 3) Only then simulate a new round (updates the session's state in place)
+    round_output = simulate_game_round(
         state,
         order_quantity=request.order_quantity,
     )
 
-    SESSIONS[session_id] = new_state
-
-    return OrderResponse(
-        state=to_game_state_response(session_id, new_state),
-        round_output=to_round_output_data(round_output),
-    )
+    return model_response(OrderResponse.model_construct(
+        state=to_game_state_delta_response(session_id, state),
+        round_output=to_round_output_data(round_output, request.include_components),
+    ))
 
 
 @router.get("/game/summary", response_model=GameSummary)
-def get_game_summary(session_id: str) -> GameSummary:
+async def get_game_summary(session_id: str) -> Response:
     """
     Generates and returns a comprehensive summary of a completed game.
     
@@ -222,8 +237,9 @@ def get_game_summary(session_id: str) -> GameSummary:
         Calculates performance metrics (fill rate, return rate, leftover rate).
         Saves any ongoing negotiation to history before ending.
         Converts all round summaries to API format.
-        Converts negotiation history to API format.
         Builds a comprehensive GameSummary object.
+        The serialized summary is kept on the state (summary_json) and returned
+        as-is on later calls, since a finished game no longer changes.
     
     Output:
         Returns a GameSummary containing:
@@ -238,16 +254,20 @@ def get_game_summary(session_id: str) -> GameSummary:
         Used by frontend to display game summary to students and instructors.
         Provides complete game history for analysis and grading.
     """
-    state = SESSIONS.get(session_id)
-    if state is None:
+    try:
+        state = SESSIONS[session_id]
+    except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    if not is_game_over(state):
+    if not state.game_over:
         raise HTTPException(
             status_code=400,
             detail="Game is not over yet.",
         )
 
+    if state.summary_json is not None:
+        return Response(content=state.summary_json, media_type="application/json")
+
     # Rounds played so far (round_number starts at 1 and is incremented after each round)
     total_rounds_played = max(0, state.round_number - 1)
 
@@ -271,45 +291,15 @@ def get_game_summary(session_id: str) -> GameSummary:
         else 0.0
     )
 
-    rounds_data = [to_round_summary_data(rs) for rs in state.round_summaries]
+    rounds_data = get_round_summaries_data(state)
     
     # Save any ongoing negotiation to history before game ends
     # Only save if game ended naturally (not early), since end_game_early already saves them
-    from datetime import datetime
-    if not state.ended_early and (state.negotiation_chat_history or state.negotiation_draft_contract):
-        # Check if this negotiation was already saved to avoid duplicates
-        current_start_time = getattr(state, "_current_negotiation_start_time", None)
-        already_saved = False
-        if state.negotiation_history and current_start_time:
-            last_neg = state.negotiation_history[-1]
-            # Check if same start_time and same chat messages (same negotiation)
-            if (last_neg.get("start_time") == current_start_time and
-                last_neg.get("chat_messages") == list(state.negotiation_chat_history)):
-                already_saved = True
-        
-        if not already_saved:
-            ongoing_negotiation = {
-                "chat_messages": list(state.negotiation_chat_history),
-                "final_decision": "ongoing" if state.negotiation_draft_contract else "rejected",
-                "final_contract": to_contract_data(state.negotiation_draft_contract) if state.negotiation_draft_contract else None,
-                "start_time": current_start_time,
-                "end_time": datetime.now().isoformat(),  # Mark end time when game ends
-            }
-            state.negotiation_history.append(ongoing_negotiation)
+    if not state.ended_early:
+        save_ongoing_negotiation(state)
     
-    # Convert negotiation history to schema format
-    negotiation_history_data = [
-        NegotiationHistory(
-            chat_messages=neg["chat_messages"],
-            final_decision=neg["final_decision"],
-            final_contract=neg["final_contract"],
-            start_time=neg.get("start_time"),
-            end_time=neg.get("end_time"),
-        )
-        for neg in state.negotiation_history
-    ]
 
-    return GameSummary(
+    summary = GameSummary.model_construct(
         session_id=session_id,
         total_rounds_played=total_rounds_played,
         total_demand=total_demand,
@@ -322,14 +312,20 @@ def get_game_summary(session_id: str) -> GameSummary:
         fill_rate=fill_rate,
         return_rate=return_rate,
         leftover_rate=leftover_rate,
-        historical_demands=list(state.historical_demands),
+        historical_demands=to_historical_demands_data(state),
         rounds=rounds_data,
-        negotiation_history=negotiation_history_data,
+        negotiation_history=state.negotiation_history,  # Already stored as NegotiationHistory records
     )
+    state.summary_json = summary.model_dump_json()
+    return Response(content=state.summary_json, media_type="application/json")
 
 
-@router.post("/game/end-early")
-def end_game_early(request: GameStateRequest) -> Dict[str, Any]:
+@router.post(
+    "/game/end-early",
+    response_model=EndGameResponse,
+    openapi_extra=json_body_openapi(GameStateRequest),
+)
+async def end_game_early(request: GameStateRequest = Depends(json_body(GameStateRequest))) -> Response:
     """
     Allows instructor to end the game early before all rounds are completed.
     
@@ -342,10 +338,10 @@ def end_game_early(request: GameStateRequest) -> Dict[str, Any]:
         Checks if game is already over (raises error if so).
         Marks the game as ended early (sets ended_early flag to True).
         Saves any ongoing negotiation to history before ending (with duplicate check).
-        Updates the game state in SESSIONS.
+        The stored game state is updated in place.
     
     Output:
-        Returns a dictionary with:
+        Returns an EndGameResponse with:
         - message: Confirmation that game ended early
         - state: Updated game state (now marked as game_over)
     
@@ -355,11 +351,12 @@ def end_game_early(request: GameStateRequest) -> Dict[str, Any]:
         After calling this, get_game_summary can be called to see results.
     """
     session_id = request.session_id
-    state = SESSIONS.get(session_id)
-    if state is None:
+    try:
+        state = SESSIONS[session_id]
+    except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if is_game_over(state):
+    if state.game_over:
         raise HTTPException(
             status_code=400,
             detail="Game is already over.",
@@ -368,32 +365,11 @@ def end_game_early(request: GameStateRequest) -> Dict[str, Any]:
     # Mark game as ended early
     state.ended_early = True
     
-    # Save any ongoing negotiation to history before ending
-    # Check if this negotiation was already saved to avoid duplicates
-    from datetime import datetime
-    if state.negotiation_chat_history or state.negotiation_draft_contract:
-        # Check if the last negotiation in history matches the current one (to avoid duplicates)
-        already_saved = False
-        current_start_time = getattr(state, "_current_negotiation_start_time", None)
-        if state.negotiation_history and current_start_time:
-            last_neg = state.negotiation_history[-1]
-            # Check if same start_time and same chat messages (same negotiation)
-            if (last_neg.get("start_time") == current_start_time and
-                last_neg.get("chat_messages") == list(state.negotiation_chat_history)):
-                already_saved = True
-        
-        if not already_saved:
-            ongoing_negotiation = {
-                "chat_messages": list(state.negotiation_chat_history),
-                "final_decision": "ongoing" if state.negotiation_draft_contract else "rejected",
-                "final_contract": to_contract_data(state.negotiation_draft_contract) if state.negotiation_draft_contract else None,
-                "start_time": current_start_time,
-                "end_time": datetime.now().isoformat(),  # Mark end time when game ends
-            }
-            state.negotiation_history.append(ongoing_negotiation)
+    # Save any ongoing negotiation to history before ending (skipped if already saved)
+    save_ongoing_negotiation(state)
     
-    return {
-        "message": "Game ended early. Summary is now available.",
-        "state": to_game_state_response(session_id, state)
-    }
+    return model_response(EndGameResponse.model_construct(
+        message="Game ended early. Summary is now available.",
+        state=to_game_state_response(session_id, state),
+    ))
 
@@ -3,9 +3,9 @@ Health and status check routes.
 """
 
 from typing import Dict, Any
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 
-from app.services.ai_client import openai_client, deepseek_client, ai_provider
+from app.services.ai_status_service import get_ai_status, get_readiness
 
 router = APIRouter()
 
@@ -56,8 +56,54 @@ def health_check() -> Dict[str, str]:
     }
 
 
+@router.get("/health/live")
+def liveness_check() -> Dict[str, str]:
+    """
+    Liveness probe: reports that the backend process is up.
+    
+    Inputs:
+        None.
+    
+    What happens:
+        Returns immediately without touching sessions, config, or AI providers.
+    
+    Output:
+        Returns {"status": "ok"}.
+    
+    Context:
+        Meant for load balancers and container orchestrators that poll frequently.
+        Never fails because of an AI provider outage (see /health/ready for that).
+    """
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def readiness_check(response: Response) -> Dict[str, Any]:
+    """
+    Readiness probe: reports whether AI negotiation can be served.
+    
+    Inputs:
+        response: The outgoing response, used to set the status code.
+    
+    What happens:
+        Runs the cached AI provider probes (see ai_status_service.get_readiness).
+        Sets HTTP 503 when every configured provider is failing.
+    
+    Output:
+        Returns {"status": "ok" | "unavailable", "checks": [{"name", "status", "latency_ms"}, ...]}.
+    
+    Context:
+        Used by load balancers to decide whether to route traffic here.
+        Probe results are cached for a few seconds, so frequent polling is cheap.
+    """
+    readiness = await get_readiness()
+    if readiness["status"] != "ok":
+        response.status_code = 503
+    return readiness
+
+
 @router.get("/ai/status")
-def ai_status_check() -> Dict[str, Any]:
+async def ai_status_check() -> Dict[str, Any]:
     """
     Checks the status and connectivity of AI providers (OpenAI and DeepSeek).
     
@@ -67,6 +113,9 @@ def ai_status_check() -> Dict[str, Any]:
     What happens:
         Checks if OpenAI client is configured and tests it with a simple API call.
         Checks if DeepSeek client is configured and tests it with a simple API call.
+        Both providers are tested concurrently without blocking the event loop.
+        Reuses a provider's test result for a few seconds (see ai_status_service)
+        so repeated polls do not each make live API calls.
         Records whether each provider is working, has errors, or is not configured.
         Provides helpful error messages for common issues (invalid API keys, etc.).
     
@@ -82,120 +131,4 @@ def ai_status_check() -> Dict[str, Any]:
         Used for debugging AI integration issues.
         Helps users understand if AI features will work.
     """
-    status = {
-        "openai_configured": openai_client is not None,
-        "deepseek_configured": deepseek_client is not None,
-        "active_provider": ai_provider,
-        "openai_status": "not_configured",
-        "openai_message": "",
-        "openai_test_successful": False,
-        "deepseek_status": "not_configured",
-        "deepseek_message": "",
-        "deepseek_test_successful": False,
-    }
-    
-    # Test OpenAI if configured
-    if openai_client:
-        status["openai_status"] = "testing"
-        try:
-            test_response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": "Say OK if you can read this."}
-                ],
-                max_tokens=10,
-            )
-            
-            test_message = test_response.choices[0].message.content
-            if test_message:
-                status["openai_status"] = "working"
-                status["openai_message"] = "OpenAI is working correctly"
-                status["openai_test_successful"] = True
-            else:
-                status["openai_status"] = "error"
-                status["openai_message"] = "OpenAI returned empty response"
-        except Exception as e:
-            status["openai_status"] = "error"
-            error_str = str(e)
-            # Provide more helpful error messages
-            if "invalid_api_key" in error_str or "401" in error_str or "Incorrect API key" in error_str:
-                status["openai_message"] = "Invalid API key. Please check your OPENAI_API_KEY in .env file. Make sure it's a real key from https://platform.openai.com/api-keys"
-            else:
-                status["openai_message"] = f"OpenAI error: {error_str}"
-    else:
-        status["openai_message"] = "Not configured (set OPENAI_API_KEY)"
-    
-    # Test DeepSeek if configured
-    if deepseek_client:
-        status["deepseek_status"] = "testing"
-        # Try multiple model names in case the free one is unavailable
-        models_to_try = [
-            "deepseek/deepseek-r1-0528:free",
-            "deepseek/deepseek-chat:free",
-            "deepseek/deepseek-chat",
-        ]
-        
-        test_successful = False
-        last_error = None
-        
-        for model_name in models_to_try:
-            try:
-                test_response = deepseek_client.chat.completions.create(
-                    model=model_name,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant."},
-                        {"role": "user", "content": "Say OK if you can read this."}
-                    ],
-                    max_tokens=20,
-                )
-                
-                # Check response structure
-                if hasattr(test_response, 'choices') and len(test_response.choices) > 0:
-                    message_obj = test_response.choices[0].message
-                    test_message = message_obj.content if hasattr(message_obj, 'content') else None
-                    
-                    if test_message and test_message.strip():
-                        status["deepseek_status"] = "working"
-                        status["deepseek_message"] = f"DeepSeek is working correctly (using {model_name})"
-                        status["deepseek_test_successful"] = True
-                        test_successful = True
-                        break
-                    else:
-                        # Empty response - try next model
-                        last_error = f"Model {model_name} returned empty response"
-                        print(f"DeepSeek: {last_error}")
-                        continue
-                else:
-                    last_error = f"Model {model_name} returned no choices"
-                    print(f"DeepSeek: {last_error}")
-                    continue
-                    
-            except Exception as e:
-                error_str = str(e)
-                last_error = f"Model {model_name}: {error_str}"
-                print(f"DeepSeek test error for {model_name}: {error_str}")
-                
-                # If it's a model not found error, try next model
-                if "model" in error_str.lower() or "not found" in error_str.lower() or "404" in error_str:
-                    continue
-                # If it's auth error, don't try other models
-                elif "invalid_api_key" in error_str or "401" in error_str or "Unauthorized" in error_str:
-                    status["deepseek_status"] = "error"
-                    status["deepseek_message"] = "Invalid API key. Please check your OPENROUTER_API_KEY in .env file. Get a key from https://openrouter.ai/keys"
-                    return status
-                # For other errors, try next model
-                else:
-                    continue
-        
-        if not test_successful:
-            status["deepseek_status"] = "error"
-            if last_error:
-                status["deepseek_message"] = f"All DeepSeek models failed. Last error: {last_error}. Check backend logs for details."
-            else:
-                status["deepseek_message"] = "DeepSeek test failed. Check backend logs for details."
-    else:
-        status["deepseek_message"] = "Not configured (set OPENROUTER_API_KEY)"
-    
-    return status
-
+    return await get_ai_status()
@@ -2,7 +2,13 @@
 Negotiation routes for contract proposals and chat.
 """
 
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from typing import AsyncIterator
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 
 from simulation.core import Contract
 from app.schemas import (
@@ -12,23 +18,27 @@ from app.schemas import (
     NegotiationChatResponse,
     AcceptCounterRequest,
     AcceptCounterResponse,
+    NegotiationHistory,
 )
 from app.services.game_service import (
-    is_game_over,
-    has_active_contract,
-    to_game_state_response,
+    to_game_state_delta_response,
     to_contract_data,
 )
-from app.services.negotiation_service import supplier_evaluate_contract
-from app.services.config_service import load_negotiation_config
-from app.services.ai_service import generate_chat_response
-from app.services.state import SESSIONS
+from app.services.negotiation_service import supplier_evaluate_contract_async
+from app.services.ai_service import generate_chat_response, stream_chat_response
+from app.services.state import SESSIONS, session_lock
+from app.utils.request_helpers import json_body, json_body_openapi
+from app.utils.response_helpers import model_response
 
 router = APIRouter()
 
 
-@router.post("/game/negotiate", response_model=NegotiateResponse)
-def negotiate(request: NegotiateRequest) -> NegotiateResponse:
+@router.post(
+    "/game/negotiate",
+    response_model=NegotiateResponse,
+    openapi_extra=json_body_openapi(NegotiateRequest),
+)
+async def negotiate(request: NegotiateRequest = Depends(json_body(NegotiateRequest))) -> Response:
     """
     Handles initial contract proposal from the student.
     
@@ -40,18 +50,21 @@ def negotiate(request: NegotiateRequest) -> NegotiateResponse:
     What happens:
         Validates session exists and game is not over.
         Checks if there's already an active contract (can't negotiate if one exists).
+        (The proposal was already checked against the negotiation config by
+        NegotiateRequest while parsing the body.)
+        Builds a Contract object from the proposal.
+        Evaluates proposal using AI (accept or reject only, no counters).
+        Checks again that the game is not over (it may have been ended during the AI call);
+        the session is not changed before this point.
         Saves any previous negotiation to history before starting new one.
         Clears previous negotiation state (chat history, draft contract).
         Stores the initial contract type (cannot be changed during negotiation).
-        Validates proposal against negotiation config (length ranges, cap types, etc.).
-        Builds a Contract object from the proposal.
-        Evaluates proposal using AI (accept or reject only, no counters).
         If accepted: makes contract active, saves negotiation to history, clears negotiation state.
         If rejected: adds rejection message to chat history, allows student to enter chat.
     
     Output:
         Returns a NegotiateResponse containing:
-        - Updated game state
+        - Updated game state (GameStateDeltaResponse: latest round only)
         - AI decision message
         - Decision ("accept" or "reject")
         - Counter contract (always None for initial proposals)
@@ -62,165 +75,140 @@ def negotiate(request: NegotiateRequest) -> NegotiateResponse:
         Counteroffers only come after conversation in the chat.
     """
     session_id = request.session_id
-    state = SESSIONS.get(session_id)
-    if state is None:
+    try:
+        state = SESSIONS[session_id]
+    except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if is_game_over(state):
-        raise HTTPException(
-            status_code=400,
-            detail="Game is over. Start a new game.",
-        )
+    # Serialize requests for the same session (chat order, contract activation)
+    async with session_lock(session_id):
+        if state.game_over:
+            raise HTTPException(
+                status_code=400,
+                detail="Game is over. Start a new game.",
+            )
     
-    if has_active_contract(state):
-        raise HTTPException(
-            status_code=400,
-            detail="A contract is already active. Wait until it expires before proposing a new one.",
-        )
+        if state.has_active_contract:
+            raise HTTPException(
+                status_code=400,
+                detail="A contract is already active. Wait until it expires before proposing a new one.",
+            )
 
-    # Save previous negotiation to history if it exists (before clearing)
-    # This preserves chat history for logging and analysis
-    if state.negotiation_chat_history or state.negotiation_draft_contract:
-        from datetime import datetime
-        previous_negotiation = {
-            "chat_messages": list(state.negotiation_chat_history),  # Copy the list to preserve it
-            "final_decision": None,  # Previous negotiation didn't complete, so no final decision
-            "final_contract": None,  # No contract was agreed upon
-            "start_time": None,  # Start time not available for previous negotiation
-            "end_time": datetime.now().isoformat(),  # Mark end time when new negotiation starts
-        }
-        state.negotiation_history.append(previous_negotiation)
-    
-    # Clear previous negotiation state when starting a NEW negotiation
-    # This ensures each negotiation attempt has its own clean chat history
-    # (prevents mixing chat history from previous negotiations)
-    from datetime import datetime
-    state.negotiation_chat_history = []  # Start fresh chat history
-    state.negotiation_draft_contract = None  # Clear any previous draft
-    # Store start time for this negotiation (will be added to history when negotiation ends)
-    state._current_negotiation_start_time = datetime.now().isoformat()
+        # One timestamp marks both the end of any previous negotiation and the start of this one
+        now_iso = datetime.now().isoformat()
 
-    # Validate against negotiation config to ensure proposal meets instructor's constraints
-    neg_config = load_negotiation_config()
-    
-    # Check contract type is allowed (instructor may restrict available types)
-    if request.contract_type not in neg_config.contract_types_available:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Contract type '{request.contract_type}' is not available. Available types: {', '.join(neg_config.contract_types_available)}",
-        )
-    
-    # Check length is within range
-    if request.length < neg_config.length_min or request.length > neg_config.length_max:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Contract length must be between {neg_config.length_min} and {neg_config.length_max} rounds.",
+        # Build a temporary Contract object from buyer's proposal
+        # This is used for evaluation - will become active if accepted
+        proposed = Contract(
+            wholesale_price=request.wholesale_price,
+            buyback_price=request.buyback_price,
+            cap_type=request.cap_type,
+            cap_value=request.cap_value,
+            length=request.length,
+            contract_type=request.contract_type,
+            revenue_share=request.revenue_share,
         )
-    
-    # Check cap type is allowed
-    if neg_config.cap_type_allowed == "fraction" and request.cap_type != "fraction":
-        raise HTTPException(
-            status_code=400,
-            detail="Only 'fraction' cap type is allowed.",
-        )
-    elif neg_config.cap_type_allowed == "unit" and request.cap_type != "unit":
-        raise HTTPException(
-            status_code=400,
-            detail="Only 'unit' cap type is allowed.",
-        )
-    
-    # Check cap value is within range
-    if request.cap_value < neg_config.cap_value_min or request.cap_value > neg_config.cap_value_max:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Cap value must be between {neg_config.cap_value_min} and {neg_config.cap_value_max}.",
-        )
-    
-    # Check revenue share is within range (if applicable)
-    if request.contract_type in ("revenue_sharing", "hybrid"):
-        if request.revenue_share < neg_config.revenue_share_min or request.revenue_share > neg_config.revenue_share_max:
+
+        # Evaluate the proposal using AI (returns accept or reject, never counter on initial proposal)
+        # Awaited on the async AI client, so the event loop keeps serving other sessions
+        decision, ai_message, counter_contract = await supplier_evaluate_contract_async(proposed)
+
+        # end_game_early does not take the session lock, so the game may have ended
+        # during the evaluation; the session is only changed once it is known to be running
+        if state.game_over:
             raise HTTPException(
                 status_code=400,
-                detail=f"Revenue share must be between {neg_config.revenue_share_min} and {neg_config.revenue_share_max}.",
+                detail="Game is over. Start a new game.",
             )
-    
-    # Build a temporary Contract object from buyer's proposal
-    # This is used for evaluation - will become active if accepted
-    proposed = Contract(
-        wholesale_price=request.wholesale_price,
-        buyback_price=request.buyback_price,
-        cap_type=request.cap_type,
-        cap_value=request.cap_value,
-        length=request.length,
-        contract_type=request.contract_type,
-        revenue_share=request.revenue_share,
-    )
-    
-    # Store the initial contract type - it cannot be changed during negotiation
-    # This ensures student can't switch from buyback to revenue_sharing mid-conversation
-    state.initial_contract_type = request.contract_type
 
-    # Evaluate the proposal using AI (returns accept or reject, never counter on initial proposal)
-    decision, ai_message, counter_contract = supplier_evaluate_contract(proposed)
+        # Save previous negotiation to history if it exists (before clearing)
+        # This preserves chat history for logging and analysis
+        # (history records are built from our own state, so model_construct skips validation)
+        if state.negotiation_chat_history or state.negotiation_draft_contract:
+            previous_negotiation = NegotiationHistory.model_construct(
+                chat_messages=state.negotiation_chat_history,  # No copy needed: replaced by a new list below
+                final_decision=None,  # Previous negotiation didn't complete, so no final decision
+                final_contract=None,  # No contract was agreed upon
+                start_time=None,  # Start time not available for previous negotiation
+                end_time=now_iso,  # Mark end time when new negotiation starts
+            )
+            state.negotiation_history.append(previous_negotiation)
+    
+        # Clear previous negotiation state when starting a NEW negotiation
+        # This ensures each negotiation attempt has its own clean chat history
+        # (prevents mixing chat history from previous negotiations)
+        state.negotiation_chat_history = []  # Start fresh chat history
+        state.negotiation_draft_contract = None  # Clear any previous draft
+        # Store start time for this negotiation (will be added to history when negotiation ends)
+        state.negotiation_start_time = now_iso
+    
+        # Store the initial contract type - it cannot be changed during negotiation
+        # This ensures student can't switch from buyback to revenue_sharing mid-conversation
+        state.initial_contract_type = request.contract_type
 
-    counter_contract_data = None
+        counter_contract_data = None
 
-    # Handle the supplier's decision
-    if decision == "accept":
-        # Contract becomes active immediately - student can now place orders
-        state.contract = proposed
-        state.contract.remaining_rounds = proposed.length  # Initialize remaining rounds
+        # Handle the supplier's decision
+        if decision == "accept":
+            # Contract becomes active immediately - student can now place orders
+            state.contract = proposed
+            state.contract.remaining_rounds = proposed.length  # Initialize remaining rounds
         
-        # Save current negotiation to history before clearing
-        # This preserves the negotiation session for game summary
-        from datetime import datetime
-        negotiation_record = {
-            "chat_messages": list(state.negotiation_chat_history),  # May be empty if accepted immediately
-            "final_decision": "accept",  # Negotiation ended with acceptance
-            "final_contract": to_contract_data(proposed),  # The accepted contract
-            "start_time": getattr(state, "_current_negotiation_start_time", None),
-            "end_time": datetime.now().isoformat(),  # Mark end time when contract becomes active
-        }
-        state.negotiation_history.append(negotiation_record)
+            # Save current negotiation to history before clearing
+            # This preserves the negotiation session for game summary
+            negotiation_record = NegotiationHistory.model_construct(
+                chat_messages=state.negotiation_chat_history,  # May be empty if accepted immediately (replaced below, so not copied)
+                final_decision="accept",  # Negotiation ended with acceptance
+                final_contract=to_contract_data(proposed),  # The accepted contract
+                start_time=state.negotiation_start_time,
+                end_time=datetime.now().isoformat(),  # Taken after the (possibly slow) AI evaluation
+            )
+            state.negotiation_history.append(negotiation_record)
         
-        # Clear negotiation state since negotiation is complete
-        state.negotiation_chat_history = []
-        state.negotiation_draft_contract = None
-        state._current_negotiation_start_time = None
+            # Clear negotiation state since negotiation is complete
+            state.negotiation_chat_history = []
+            state.negotiation_draft_contract = None
+            state.negotiation_start_time = None
 
-    elif decision == "counter":
-        # Store counter as draft for potential acceptance
-        # Note: This branch should not occur for initial proposals (AI only returns accept/reject)
-        if counter_contract is not None:
-            counter_contract_data = to_contract_data(counter_contract)
-            state.negotiation_draft_contract = counter_contract
-        # Don't save to history yet - negotiation is still ongoing
+        elif decision == "counter":
+            # Store counter as draft for potential acceptance
+            # Note: This branch should not occur for initial proposals (AI only returns accept/reject)
+            if counter_contract is not None:
+                counter_contract_data = to_contract_data(counter_contract)
+                state.negotiation_draft_contract = counter_contract
+            # Don't save to history yet - negotiation is still ongoing
 
-    elif decision == "reject":
-        # Student may enter negotiation chat to discuss terms
-        # Add the rejection message to chat history so AI has context for future messages
-        state.negotiation_chat_history.append({
-            "role": "supplier",
-            "content": ai_message  # The rejection explanation from AI
-        })
-        # Don't save to history yet - negotiation is still ongoing, student can chat
+        elif decision == "reject":
+            # Student may enter negotiation chat to discuss terms
+            # Add the rejection message to chat history so AI has context for future messages
+            state.negotiation_chat_history.append({
+                "role": "supplier",
+                "content": ai_message  # The rejection explanation from AI
+            })
+            # Don't save to history yet - negotiation is still ongoing, student can chat
 
-    else:
-        raise HTTPException(status_code=500, detail="Invalid supplier decision")
+        else:
+            raise HTTPException(status_code=500, detail="Invalid supplier decision")
 
-    # Build response game state (current active contract)
-    state_response = to_game_state_response(session_id, state)
+        # Build response game state (current active contract)
+        state_response = to_game_state_delta_response(session_id, state)
 
-    return NegotiateResponse(
-        state=state_response,
-        ai_message=ai_message,
-        decision=decision,
-        counter_contract=counter_contract_data,
-    )
+        return model_response(NegotiateResponse.model_construct(
+            state=state_response,
+            ai_message=ai_message,
+            decision=decision,
+            counter_contract=counter_contract_data,
+        ))
 
 
-@router.post("/game/negotiate/chat", response_model=NegotiationChatResponse)
-def negotiation_chat(request: NegotiationChatRequest) -> NegotiationChatResponse:
+@router.post(
+    "/game/negotiate/chat",
+    response_model=NegotiationChatResponse,
+    openapi_extra=json_body_openapi(NegotiationChatRequest),
+)
+async def negotiation_chat(
+    request: NegotiationChatRequest = Depends(json_body(NegotiationChatRequest)),
+) -> Response:
     """
     Handles chat messages during negotiation between student and AI supplier.
     
@@ -231,9 +219,10 @@ def negotiation_chat(request: NegotiationChatRequest) -> NegotiationChatResponse
     
     What happens:
         Validates session exists and game is not over.
-        Adds student's message to negotiation chat history.
-        Generates AI response using generate_chat_response() with full context.
-        Adds AI's response to chat history.
+        Generates AI response using generate_chat_response() with full context
+        (the chat history plus the student's new message).
+        Checks again that the game is not over (it may have been ended during the AI call).
+        Adds the student's message and the AI's response to chat history.
         Checks if AI detected agreement and created a draft contract.
         If draft contract created, stores it for student to accept/reject.
     
@@ -248,53 +237,164 @@ def negotiation_chat(request: NegotiationChatRequest) -> NegotiationChatResponse
         Draft contracts from chat can be accepted via accept_counter endpoint.
     """
     session_id = request.session_id
-    state = SESSIONS.get(session_id)
-    if state is None:
+    try:
+        state = SESSIONS[session_id]
+    except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if is_game_over(state):
+    # Serialize requests for the same session (chat order, contract activation)
+    async with session_lock(session_id):
+        if state.game_over:
+            raise HTTPException(
+                status_code=400,
+                detail="Game is over. Start a new game.",
+            )
+    
+        # The AI sees the student message, but it is only saved together with the reply
+        student_entry = {"role": "student", "content": request.message}
+    
+        # Step 3: Generate AI response with game context
+        # Get initial contract type - it's fixed and cannot be changed
+        initial_contract_type = state.initial_contract_type or "buyback"
+    
+        # Awaited on the async AI client, so the event loop keeps serving other sessions
+        supplier_response = await generate_chat_response(
+            state.negotiation_chat_history + [student_entry],
+            state.negotiation_draft_contract,
+            state,  # Pass game state for context
+            initial_contract_type  # Pass initial contract type to enforce it
+        )
+    
+        # end_game_early does not take the session lock, so the game may have ended
+        # during the AI call; its saved negotiation record must not gain these messages
+        if state.game_over:
+            raise HTTPException(
+                status_code=400,
+                detail="Game is over. Start a new game.",
+            )
+    
+        # Add student message and supplier response to chat history
+        state.negotiation_chat_history.append(student_entry)
+        state.negotiation_chat_history.append({
+            "role": "supplier",
+            "content": supplier_response["message"]
+        })
+    
+        # Step 4: Update draft contract if AI detected agreement
+        draft_contract_data = None
+        if supplier_response.get("draft_contract"):
+            state.negotiation_draft_contract = supplier_response["draft_contract"]
+            draft_contract_data = to_contract_data(state.negotiation_draft_contract)
+    
+        return model_response(NegotiationChatResponse.model_construct(
+            supplier_message=supplier_response["message"],
+            negotiation_draft_contract=draft_contract_data,
+        ))
+
+
+@router.post(
+    "/game/negotiate/chat/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+    openapi_extra=json_body_openapi(NegotiationChatRequest),
+)
+async def negotiation_chat_stream(
+    request: NegotiationChatRequest = Depends(json_body(NegotiationChatRequest)),
+) -> StreamingResponse:
+    """
+    Streaming version of /game/negotiate/chat using Server-Sent Events.
+    
+    Inputs:
+        request: NegotiationChatRequest containing:
+            - session_id: Game session identifier
+            - message: The student's chat message
+    
+    What happens:
+        Validates session exists and game is not over (before streaming starts,
+        so errors still come back as normal HTTP error responses).
+        Streams the AI supplier's reply with stream_chat_response().
+        Sends each piece of reply text as an event: data: {"delta": "..."}
+        When the reply is complete, adds the student message and the supplier reply
+        to chat history and stores any draft contract (under the session lock).
+        Partial replies are never written to chat history.
+        Sends a final event: data: {"final": NegotiationChatResponse}
+        If the game ended or a different negotiation started while streaming, nothing
+        is written and the final event is data: {"error": "..."} instead.
+    
+    Output:
+        Returns a text/event-stream response.
+    
+    Context:
+        Used by the frontend chat so the supplier's reply appears as the AI writes it.
+        The lock is not held while streaming, so a slow AI reply does not block the
+        session's other requests; the two messages are appended together at the end.
+    """
+    session_id = request.session_id
+    try:
+        state = SESSIONS[session_id]
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    if state.game_over:
         raise HTTPException(
             status_code=400,
             detail="Game is over. Start a new game.",
         )
     
-    # Add student message to chat history
-    state.negotiation_chat_history.append({
-        "role": "student",
-        "content": request.message
-    })
-    
-    # Step 3: Generate AI response with game context
+    student_entry = {"role": "student", "content": request.message}
+    async with session_lock(session_id):
+        # The AI sees the new message, but it is only saved once the reply completes
+        # (the list itself is kept to tell whether this negotiation is still open then)
+        chat_history = state.negotiation_chat_history
+        pending_history = chat_history + [student_entry]
+        draft_contract = state.negotiation_draft_contract
     # Get initial contract type - it's fixed and cannot be changed
     initial_contract_type = state.initial_contract_type or "buyback"
     
-    supplier_response = generate_chat_response(
-        state.negotiation_chat_history,
-        state.negotiation_draft_contract,
-        state,  # Pass game state for context
-        initial_contract_type  # Pass initial contract type to enforce it
-    )
-    
-    # Add supplier response to chat history
-    state.negotiation_chat_history.append({
-        "role": "supplier",
-        "content": supplier_response["message"]
-    })
-    
-    # Step 4: Update draft contract if AI detected agreement
-    draft_contract_data = None
-    if supplier_response.get("draft_contract"):
-        state.negotiation_draft_contract = supplier_response["draft_contract"]
-        draft_contract_data = to_contract_data(state.negotiation_draft_contract)
-    
-    return NegotiationChatResponse(
-        supplier_message=supplier_response["message"],
-        negotiation_draft_contract=draft_contract_data,
-    )
+    async def event_stream() -> AsyncIterator[bytes]:
+        # The AI stream is a blocking iterator, so each chunk is pulled in a worker thread
+        async for kind, payload in iterate_in_threadpool(stream_chat_response(
+            pending_history,
+            draft_contract,
+            state,
+            initial_contract_type,
+        )):
+            if kind == "delta":
+                yield b"data: " + orjson.dumps({"delta": payload}) + b"\n\n"
+                continue
+            
+            async with session_lock(session_id):
+                # The game may have ended, or a new negotiation replaced the chat, while streaming
+                if state.game_over or state.negotiation_chat_history is not chat_history:
+                    yield b'data: {"error": "Negotiation ended before the reply completed."}\n\n'
+                    return
+                chat_history.append(student_entry)
+                chat_history.append({
+                    "role": "supplier",
+                    "content": payload["message"]
+                })
+                draft_contract_data = None
+                if payload.get("draft_contract"):
+                    state.negotiation_draft_contract = payload["draft_contract"]
+                    draft_contract_data = to_contract_data(state.negotiation_draft_contract)
+            
+            final = NegotiationChatResponse.model_construct(
+                supplier_message=payload["message"],
+                negotiation_draft_contract=draft_contract_data,
+            )
+            yield b'data: {"final": ' + final.model_dump_json().encode() + b"}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
-@router.post("/game/negotiate/accept-counter", response_model=AcceptCounterResponse)
-def accept_counter(request: AcceptCounterRequest) -> AcceptCounterResponse:
+@router.post(
+    "/game/negotiate/accept-counter",
+    response_model=AcceptCounterResponse,
+    openapi_extra=json_body_openapi(AcceptCounterRequest),
+)
+async def accept_counter(
+    request: AcceptCounterRequest = Depends(json_body(AcceptCounterRequest)),
+) -> Response:
     """
     Handles student's acceptance or rejection of a draft contract (offer).
     
@@ -326,61 +426,63 @@ def accept_counter(request: AcceptCounterRequest) -> AcceptCounterResponse:
         Rejecting allows negotiation to continue in chat.
     """
     session_id = request.session_id
-    state = SESSIONS.get(session_id)
-    if state is None:
+    try:
+        state = SESSIONS[session_id]
+    except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if is_game_over(state):
-        raise HTTPException(
-            status_code=400,
-            detail="Game is over. Start a new game.",
-        )
-    
-    if request.accept:
-        # Accept the counteroffer - make draft contract active
-        if state.negotiation_draft_contract is None:
+    # Serialize requests for the same session (chat order, contract activation)
+    async with session_lock(session_id):
+        if state.game_over:
             raise HTTPException(
                 status_code=400,
-                detail="No counteroffer available to accept.",
+                detail="Game is over. Start a new game.",
             )
+    
+        if request.accept:
+            # Accept the counteroffer - make draft contract active
+            if state.negotiation_draft_contract is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="No counteroffer available to accept.",
+                )
         
-        # Add acceptance message to chat history before saving (for completeness in history)
-        state.negotiation_chat_history.append({
-            "role": "student",
-            "content": "I accept the counteroffer."
-        })
-        
-        # Save current negotiation to history before clearing
-        from datetime import datetime
-        negotiation_record = {
-            "chat_messages": list(state.negotiation_chat_history),  # Includes the acceptance message
-            "final_decision": "accept",
-            "final_contract": to_contract_data(state.negotiation_draft_contract),
-            "start_time": getattr(state, "_current_negotiation_start_time", None),
-            "end_time": datetime.now().isoformat(),  # Mark end time when contract becomes active
-        }
-        state.negotiation_history.append(negotiation_record)
-        
-        state.contract = state.negotiation_draft_contract
-        state.contract.remaining_rounds = state.contract.length
-        # Clear negotiation state
-        state.negotiation_chat_history = []
-        state.negotiation_draft_contract = None
-        state._current_negotiation_start_time = None
-    else:
-        # Reject counteroffer - clear draft but keep chat history
-        # Add a message to chat history so AI knows the student rejected the previous proposal
-        # This helps the AI understand context when conversation continues
-        if state.negotiation_draft_contract:
-            # Add student rejection message to chat history for context
+            # Add acceptance message to chat history before saving (for completeness in history)
             state.negotiation_chat_history.append({
                 "role": "student",
-                "content": "I've rejected the previous counteroffer. Let's continue discussing terms."
+                "content": "I accept the counteroffer."
             })
-        state.negotiation_draft_contract = None
-        # Don't save to history yet - negotiation might continue
-    
-    return AcceptCounterResponse(
-        state=to_game_state_response(session_id, state)
-    )
+        
+            # Save current negotiation to history before clearing
+            negotiation_record = NegotiationHistory.model_construct(
+                chat_messages=state.negotiation_chat_history,  # Includes the acceptance message (replaced below, so not copied)
+                final_decision="accept",
+                final_contract=to_contract_data(state.negotiation_draft_contract),
+                start_time=state.negotiation_start_time,
+                end_time=datetime.now().isoformat(),  # Mark end time when contract becomes active
+            )
+            state.negotiation_history.append(negotiation_record)
+        
+            state.contract = state.negotiation_draft_contract
+            state.contract.remaining_rounds = state.contract.length
+            # Clear negotiation state
+            state.negotiation_chat_history = []
+            state.negotiation_draft_contract = None
+            state.negotiation_start_time = None
+        else:
+            # Reject counteroffer - clear draft but keep chat history
+            # Add a message to chat history so AI knows the student rejected the previous proposal
+            # This helps the AI understand context when conversation continues
+            if state.negotiation_draft_contract:
+                # Add student rejection message to chat history for context
+                state.negotiation_chat_history.append({
+                    "role": "student",
+                    "content": "I've rejected the previous counteroffer. Let's continue discussing terms."
+                })
+            state.negotiation_draft_contract = None
+            # Don't save to history yet - negotiation might continue
+    
+        return model_response(AcceptCounterResponse.model_construct(
+            state=to_game_state_delta_response(session_id, state)
+        ))
 
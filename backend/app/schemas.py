@@ -8,10 +8,41 @@ These schemas are used for:
 
 All models inherit from Pydantic's BaseModel, which provides automatic validation,
 JSON serialization, and type checking.
+
+Models that are only ever built by the server (response data, history records, the
+cached negotiation config and history summary) are frozen, so a shared instance
+cannot be changed by accident.
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from functools import cached_property
+from string import Formatter
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import List, Any, Literal
+from typing_extensions import TypedDict  # pydantic needs the typing_extensions version before Python 3.12
+
+# Allowed contract and return-cap types, shared by request and response schemas
+ContractType = Literal["buyback", "revenue_sharing", "hybrid"]
+CapType = Literal["fraction", "unit"]
+
+# Rendered system prompts remembered per negotiation config (see render_system_prompt)
+RENDERED_PROMPT_CACHE_SIZE = 256
+
+
+class ChatEntry(TypedDict):
+    """
+    One chat history entry, in the plain-dict form stored in GameState.negotiation_chat_history.
+    
+    Keys:
+        role: "student" or "supplier" - who sent the message
+        content: The message text
+    
+    Context:
+        A TypedDict (not a model) because the history is kept as plain dicts;
+        pydantic checks exactly these two keys instead of every key/value pair
+        of a free-form Dict[str, str].
+    """
+    role: Literal["student", "supplier"]
+    content: str
 
 
 # ============================================================================
@@ -71,6 +102,8 @@ class HistorySummary(BaseModel):
         Used for display purposes only - actual simulation uses full history.
         Calculated in build_config_state_response() in main.py.
     """
+    model_config = ConfigDict(frozen=True)
+
     count: int
     min: int
     max: int
@@ -97,6 +130,8 @@ class ConfigStateResponse(BaseModel):
         Used when instructor views or updates game parameters.
         Built by build_config_state_response() in main.py.
     """
+    model_config = ConfigDict(frozen=True)
+
     economic_params: EconomicParamsData
     history_summary: HistorySummary
 
@@ -145,21 +180,107 @@ class NegotiationConfigData(BaseModel):
         - Loaded from config/negotiation_config.json file
         - Used to validate student proposals and configure AI behavior
     
+    Validation:
+        Field constraints and check_ranges() reject inconsistent configs when the
+        request body is parsed, so invalid updates return a 422 before the route runs.
+    
     Context:
         Allows instructor to restrict negotiation options for educational purposes.
         Constraints are enforced when students submit proposals.
         AI system prompt uses this config to understand negotiation boundaries.
     """
-    contract_types_available: List[str]
-    length_min: int
+    model_config = ConfigDict(frozen=True)
+
+    contract_types_available: List[ContractType] = Field(min_length=1)
+    length_min: int = Field(ge=1)
     length_max: int
-    cap_type_allowed: str  # "fraction", "unit", or "both"
-    cap_value_min: float
+    cap_type_allowed: Literal["fraction", "unit", "both"]
+    cap_value_min: float = Field(ge=0)
     cap_value_max: float
-    revenue_share_min: float
-    revenue_share_max: float
+    revenue_share_min: float = Field(ge=0, le=1)
+    revenue_share_max: float = Field(le=1)
     system_prompt_template: str
-    example_dialog: List[Dict[str, str]] = Field(default_factory=list)
+    example_dialog: List[ChatEntry] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def check_ranges(self) -> "NegotiationConfigData":
+        """
+        Checks that each min/max pair forms a valid range.
+
+        Single-field bounds (length_min >= 1, shares within 0-1, allowed contract
+        and cap types) are enforced by the field declarations above.
+        """
+        if self.length_max < self.length_min:
+            raise ValueError("length_max must be >= length_min")
+        if self.cap_value_max < self.cap_value_min:
+            raise ValueError("cap_value_max must be >= cap_value_min")
+        if self.revenue_share_max < self.revenue_share_min:
+            raise ValueError("revenue_share_max must be between revenue_share_min and 1")
+        return self
+
+    @cached_property
+    def contract_types_set(self) -> frozenset[str]:
+        """
+        Available contract types as a frozenset, for O(1) membership checks.
+
+        Computed once per loaded config (the loader caches the config object until
+        the file changes); not part of the serialized schema.
+        """
+        return frozenset(self.contract_types_available)
+
+    @cached_property
+    def system_prompt_parts(self) -> tuple[tuple[str, str | None, str | None], ...] | None:
+        """
+        system_prompt_template split once into (literal, field name, format spec) parts.
+
+        Lets render_system_prompt() skip re-parsing the template on every chat turn.
+        None when the template uses str.format features beyond plain named fields
+        (positional or attribute/index fields, !r conversions, nested specs); those
+        templates are rendered with str.format instead.
+        """
+        parts = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(self.system_prompt_template):
+            if field_name is not None and (not field_name.isidentifier() or conversion or "{" in format_spec):
+                return None
+            parts.append((literal, field_name, format_spec))
+        return tuple(parts)
+
+    @cached_property
+    def rendered_system_prompts(self) -> dict[tuple[tuple[str, Any], ...], str]:
+        """
+        Prompts already rendered from this config, keyed by their sorted values.
+
+        Filled by render_system_prompt(); like the properties above it lives on the
+        config object and is not part of the serialized schema.
+        """
+        return {}
+
+    def render_system_prompt(self, **values: Any) -> str:
+        """
+        Fills in system_prompt_template; same result as system_prompt_template.format(**values).
+
+        Results are remembered per config object (at most RENDERED_PROMPT_CACHE_SIZE),
+        so chat turns with the same parameters, demand history and contract type
+        reuse the rendered prompt. A reloaded config starts with an empty cache.
+        """
+        key = tuple(sorted(values.items()))
+        rendered = self.rendered_system_prompts
+        prompt = rendered.get(key)
+        if prompt is not None:
+            return prompt
+
+        parts = self.system_prompt_parts
+        if parts is None:
+            prompt = self.system_prompt_template.format(**values)
+        else:
+            prompt = "".join([
+                literal if field_name is None else literal + format(values[field_name], format_spec)
+                for literal, field_name, format_spec in parts
+            ])
+        if len(rendered) >= RENDERED_PROMPT_CACHE_SIZE:
+            rendered.clear()
+        rendered[key] = prompt
+        return prompt
 
 
 class NegotiationConfigResponse(BaseModel):
@@ -178,6 +299,8 @@ class NegotiationConfigResponse(BaseModel):
         Wraps NegotiationConfigData for API responses.
         Used when instructor views or updates negotiation constraints.
     """
+    model_config = ConfigDict(frozen=True)
+
     negotiation_config: NegotiationConfigData
 
 
@@ -226,16 +349,55 @@ class ContractData(BaseModel):
         Used whenever contract information needs to be sent to frontend.
         Student sees this information to understand their active contract.
     """
+    model_config = ConfigDict(frozen=True)
+
     wholesale_price: float          # w
     buyback_price: float            # b
-    cap_type: str                   # "fraction" or "unit"
+    cap_type: CapType               # "fraction" or "unit"
     cap_value: float                # φ or B_max
     length: int                     # contract length in rounds
     remaining_rounds: int           # remaining rounds on this contract
-    contract_type: str = "buyback"
+    contract_type: ContractType = "buyback"
     revenue_share: float = 0.0
 
 
+class RoundComponents(BaseModel):
+    """
+    Detailed revenue and cost breakdown of one round (the parts behind RoundOutputData's totals).
+    
+    Fields:
+        Buyer-side: retail_revenue, salvage_revenue_buyer, buyback_refund_buyer,
+                    wholesale_cost_buyer, return_shipping_cost_buyer, revenue_share_payment_buyer
+        Supplier-side: wholesale_revenue_supplier, salvage_revenue_supplier,
+                       production_cost_supplier, buyback_cost_supplier,
+                       return_handling_cost_supplier, revenue_share_revenue_supplier
+    
+    Usage:
+        - Nested in RoundOutputData.components when /game/order is called with include_components
+    
+    Context:
+        Kept out of the default order response: the game UI only shows the totals,
+        so sending the twelve component fields every round doubled the payload.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    # Buyer-side components
+    retail_revenue: float
+    salvage_revenue_buyer: float
+    buyback_refund_buyer: float
+    wholesale_cost_buyer: float
+    return_shipping_cost_buyer: float
+    revenue_share_payment_buyer: float
+
+    # Supplier-side components
+    wholesale_revenue_supplier: float
+    salvage_revenue_supplier: float
+    production_cost_supplier: float
+    buyback_cost_supplier: float
+    return_handling_cost_supplier: float
+    revenue_share_revenue_supplier: float
+
+
 class RoundOutputData(BaseModel):
     """
     Results from one round of gameplay (API representation of RoundOutput).
@@ -255,23 +417,21 @@ class RoundOutputData(BaseModel):
         supplier_profit: Net profit for supplier this round
     
     Fields (Detailed Components - Optional):
-        Buyer-side: retail_revenue, salvage_revenue_buyer, buyback_refund_buyer,
-                    wholesale_cost_buyer, return_shipping_cost_buyer, revenue_share_payment_buyer
-        Supplier-side: wholesale_revenue_supplier, salvage_revenue_supplier,
-                       production_cost_supplier, buyback_cost_supplier,
-                       return_handling_cost_supplier, revenue_share_revenue_supplier
+        components: RoundComponents breakdown, or None unless the order request
+                    asked for it (include_components)
     
     Usage:
         - Used in `/game/order` endpoint response (OrderResponse)
-        - Converted from RoundOutput (core.py) using to_round_output_data() in main.py
+        - Converted from RoundOutput (core.py) using to_round_output_data() in game_service.py
         - Displayed to student showing results of their order decision
-        - Shows detailed breakdown of profits and costs
     
     Context:
         This is the API-friendly version of the RoundOutput dataclass.
         Returned immediately after student places an order.
         Student uses this to understand consequences of their decisions.
     """
+    model_config = ConfigDict(frozen=True)
+
     # decision + demand
     order_quantity: int
     realized_demand: int
@@ -288,21 +448,8 @@ class RoundOutputData(BaseModel):
     supplier_cost: float
     supplier_profit: float
 
-    # Buyer-side components
-    retail_revenue: float | None = None
-    salvage_revenue_buyer: float | None = None
-    buyback_refund_buyer: float | None = None
-    wholesale_cost_buyer: float | None = None
-    return_shipping_cost_buyer: float | None = None
-    revenue_share_payment_buyer: float | None = None
-
-    # Supplier-side components
-    wholesale_revenue_supplier: float | None = None
-    salvage_revenue_supplier: float | None = None
-    production_cost_supplier: float | None = None
-    buyback_cost_supplier: float | None = None
-    return_handling_cost_supplier: float | None = None
-    revenue_share_revenue_supplier: float | None = None
+    # Detailed breakdown (opt-in)
+    components: RoundComponents | None = None
 
 
 class RoundSummaryData(BaseModel):
@@ -336,6 +483,8 @@ class RoundSummaryData(BaseModel):
         Used to show students their performance history.
         Contract details included for instructor analysis but hidden from student view.
     """
+    model_config = ConfigDict(frozen=True)
+
     round_index: int
     order_quantity: int
     realized_demand: int
@@ -351,11 +500,11 @@ class RoundSummaryData(BaseModel):
     # Contract details for logging (not shown to player in frontend)
     wholesale_price: float
     buyback_price: float
-    cap_type: str
+    cap_type: CapType
     cap_value: float
     contract_length: int
     remaining_rounds: int
-    contract_type: str
+    contract_type: ContractType
     revenue_share: float
 
 
@@ -372,8 +521,8 @@ class NegotiationHistory(BaseModel):
     
     Usage:
         - Used in GameSummary.negotiation_history (list of all negotiations)
-        - Stored in GameState.negotiation_history during gameplay
-        - Converted to this schema format in get_game_summary() in main.py
+        - Stored in GameState.negotiation_history during gameplay (built when a negotiation ends)
+        - Returned as-is in get_game_summary() (no conversion needed)
         - Displayed in game summary for instructor analysis
     
     Context:
@@ -382,7 +531,9 @@ class NegotiationHistory(BaseModel):
         Used by instructor to review student negotiation skills.
         Includes full conversation history for educational analysis.
     """
-    chat_messages: List[Dict[str, str]] = Field(default_factory=list)  # List of {role: str, content: str}
+    model_config = ConfigDict(frozen=True)
+
+    chat_messages: List[ChatEntry] = Field(default_factory=list)
     final_decision: str | None = None  # "accept", "reject", or None (ongoing)
     final_contract: ContractData | None = None  # The contract that was eventually accepted (if any)
     start_time: str | None = None  # ISO format timestamp when negotiation started
@@ -424,6 +575,8 @@ class GameSummary(BaseModel):
         Includes all rounds, negotiations, and performance metrics.
         Available after game ends (naturally or when instructor ends early).
     """
+    model_config = ConfigDict(frozen=True)
+
     session_id: str
 
     total_rounds_played: int
@@ -470,10 +623,8 @@ class GameStateResponse(BaseModel):
     Usage:
         - Returned by `/game/state` endpoint (POST)
         - Returned by `/game/start` endpoint (POST)
-        - Returned by `/game/negotiate` endpoint (POST)
-        - Returned by `/game/order` endpoint (POST)
-        - Returned by `/game/negotiate/accept-counter` endpoint (POST)
         - Used by frontend to display current game status
+        - Game actions (negotiate, order, accept-counter) return GameStateDeltaResponse instead
     
     Context:
         This is the main game state object sent to frontend.
@@ -481,6 +632,8 @@ class GameStateResponse(BaseModel):
         Frontend uses this to refresh the UI and show current status.
         Converted from GameState (core.py) using to_game_state_response() in main.py.
     """
+    model_config = ConfigDict(frozen=True)
+
     session_id: str
     round_number: int
     total_rounds: int
@@ -494,6 +647,42 @@ class GameStateResponse(BaseModel):
     rounds: List[RoundSummaryData] = Field(default_factory=list)
 
 
+class GameStateDeltaResponse(BaseModel):
+    """
+    Game state returned after a game action, without the full list of round summaries.
+    
+    Fields:
+        Same as GameStateResponse, except rounds is replaced by:
+        last_round: Summary of the most recent completed round (None before the first round)
+        rounds_count: Number of completed rounds
+    
+    Usage:
+        - Returned by `/game/negotiate` endpoint (POST)
+        - Returned by `/game/order` endpoint (POST)
+        - Returned by `/game/negotiate/accept-counter` endpoint (POST)
+    
+    Context:
+        Each action changes at most the latest round, so resending every earlier
+        round summary made the response grow with the game. `/game/state` and
+        `/game/summary` still return the full rounds list.
+        Converted from GameState (core.py) using to_game_state_delta_response() in game_service.py.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    session_id: str
+    round_number: int
+    total_rounds: int
+    contract: ContractData
+    cumulative_buyer_profit: float
+    cumulative_supplier_profit: float
+    game_over: bool
+    demand_method: str                  # "bootstrap" or "normal"
+
+    historical_demands: List[int]
+    last_round: RoundSummaryData | None = None
+    rounds_count: int = 0
+
+
 class GameStartResponse(BaseModel):
     """
     Response when starting a new game.
@@ -509,6 +698,28 @@ class GameStartResponse(BaseModel):
         Wraps GameStateResponse for game start endpoint.
         Frontend stores session_id from this response.
     """
+    model_config = ConfigDict(frozen=True)
+
+    state: GameStateResponse
+
+
+class EndGameResponse(BaseModel):
+    """
+    Response when the instructor ends a game early.
+    
+    Fields:
+        message: Confirmation message
+        state: Final game state (game_over is True)
+    
+    Usage:
+        - Returned by `/game/end-early` endpoint (POST)
+    
+    Context:
+        After this, `/game/summary` can be called to see the results.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    message: str
     state: GameStateResponse
 
 
@@ -569,6 +780,11 @@ class NegotiateRequest(BaseModel):
         - Sent from frontend when student submits initial contract proposal
         - Validated against negotiation config constraints before evaluation
     
+    Validation:
+        Field bounds and check_negotiation_config() run while the body is parsed,
+        so proposals outside the instructor's constraints get a 422 before the
+        route handler (and any session changes) runs.
+    
     Context:
         Student's initial contract proposal.
         Supplier (AI) evaluates this and returns accept/reject decision.
@@ -577,11 +793,51 @@ class NegotiateRequest(BaseModel):
     session_id: str
     wholesale_price: float
     buyback_price: float
-    cap_type: str
-    cap_value: float
-    length: int
-    contract_type: str = "buyback"          # "buyback", "revenue_sharing", "hybrid"
-    revenue_share: float = 0.0              # used for revenue-sharing/hybrid
+    cap_type: CapType
+    cap_value: float = Field(ge=0)
+    length: int = Field(ge=1)
+    contract_type: ContractType = "buyback"
+    revenue_share: float = Field(default=0.0, ge=0, le=1)  # used for revenue-sharing/hybrid
+
+    @model_validator(mode="after")
+    def check_negotiation_config(self) -> "NegotiateRequest":
+        """
+        Checks the proposal against the instructor's negotiation config.
+
+        Uses the cached config from load_negotiation_config(), so no file is
+        parsed per request.
+        """
+        # Imported here because config_service imports this module
+        from app.services.config_service import load_negotiation_config
+
+        neg_config = load_negotiation_config()
+
+        # Check contract type is allowed (instructor may restrict available types)
+        if self.contract_type not in neg_config.contract_types_set:
+            raise ValueError(
+                f"Contract type '{self.contract_type}' is not available. Available types: {', '.join(neg_config.contract_types_available)}"
+            )
+
+        # Check length is within range
+        if self.length < neg_config.length_min or self.length > neg_config.length_max:
+            raise ValueError(f"Contract length must be between {neg_config.length_min} and {neg_config.length_max} rounds.")
+
+        # Check cap type is allowed
+        if neg_config.cap_type_allowed != "both" and self.cap_type != neg_config.cap_type_allowed:
+            raise ValueError(f"Only '{neg_config.cap_type_allowed}' cap type is allowed.")
+
+        # Check cap value is within range
+        if self.cap_value < neg_config.cap_value_min or self.cap_value > neg_config.cap_value_max:
+            raise ValueError(f"Cap value must be between {neg_config.cap_value_min} and {neg_config.cap_value_max}.")
+
+        # Check revenue share is within range (if applicable)
+        if self.contract_type in ("revenue_sharing", "hybrid"):
+            if self.revenue_share < neg_config.revenue_share_min or self.revenue_share > neg_config.revenue_share_max:
+                raise ValueError(
+                    f"Revenue share must be between {neg_config.revenue_share_min} and {neg_config.revenue_share_max}."
+                )
+
+        return self
 
 
 class NegotiateResponse(BaseModel):
@@ -605,7 +861,9 @@ class NegotiateResponse(BaseModel):
         Only returns accept or reject - no counteroffers on initial proposals.
         Counteroffers only emerge from chat discussions.
     """
-    state: GameStateResponse
+    model_config = ConfigDict(frozen=True)
+
+    state: GameStateDeltaResponse
     ai_message: str                         # simple text explanation from "AI supplier"
     decision: str                           # "accept" or "reject"
     counter_contract: ContractData | None = None  # Always None for initial proposals
@@ -625,7 +883,7 @@ class ChatMessage(BaseModel):
         timestamp: Optional ISO timestamp (not currently used but available)
     
     Usage:
-        - Used internally in negotiation_chat_history (list of dicts, not this schema)
+        - Not used for chat history, which is stored as ChatEntry dicts
         - Could be used for more structured chat message handling in future
     
     Context:
@@ -676,10 +934,60 @@ class NegotiationChatResponse(BaseModel):
         May include a draft contract if student agreed to terms.
         Student can then accept/reject the draft via accept_counter endpoint.
     """
+    model_config = ConfigDict(frozen=True)
+
     supplier_message: str
     negotiation_draft_contract: ContractData | None = None  # Draft contract from chat if agreement detected
 
 
+class AIContractTerms(BaseModel):
+    """
+    Contract terms as written by the AI supplier inside its JSON chat reply.
+    
+    Fields:
+        wholesale_price, buyback_price: Prices per unit (0 if missing)
+        cap_type, cap_value, revenue_share: None if missing (config defaults apply)
+        contract_length, length: Contract length; either key is accepted
+    
+    Usage:
+        - Validated from AIChatReply.contract in ai_service._parse_ai_reply()
+        - Turned into a Contract, then clamped to the negotiation config ranges
+    
+    Context:
+        Never sent to the frontend. Numbers are coerced like float()/int() would
+        (e.g. "25" becomes 25.0); unknown keys such as contract_type are ignored
+        because the contract type is fixed for the negotiation.
+    """
+    wholesale_price: float = 0.0
+    buyback_price: float = 0.0
+    cap_type: str | None = None
+    cap_value: float | None = None
+    contract_length: int | None = None
+    length: int | None = None
+    revenue_share: float | None = None
+
+
+class AIChatReply(BaseModel):
+    """
+    JSON reply the AI supplier is asked to give in negotiation chat.
+    
+    Fields:
+        response: Message shown to the student
+        contract: Raw contract object or None (validated separately as AIContractTerms)
+    
+    Usage:
+        - Parsed with model_validate_json() in ai_service._parse_ai_reply()
+    
+    Context:
+        contract stays untyped here so bad contract terms only drop the draft
+        contract instead of the whole reply. The reply's negotiation_complete flag
+        is not read (a returned contract is what creates the draft), so it is ignored
+        like any other extra key.
+    """
+    response: str = ""
+    contract: Any = None
+
+
 class AcceptCounterRequest(BaseModel):
     """
     Request to accept or reject a draft contract (offer).
@@ -717,7 +1025,9 @@ class AcceptCounterResponse(BaseModel):
         Confirms the student's decision and updates game state.
         If accepted, contract is now active and orders can be placed.
     """
-    state: GameStateResponse
+    model_config = ConfigDict(frozen=True)
+
+    state: GameStateDeltaResponse
 
 
 # ============================================================================
@@ -731,6 +1041,8 @@ class OrderRequest(BaseModel):
     Fields:
         session_id: Unique identifier for the game session
         order_quantity: Number of units student wants to order (Q)
+        include_components: Also return the round's detailed revenue/cost breakdown
+            (RoundOutputData.components); off by default to keep responses small
     
     Usage:
         - Used in `/game/order` endpoint (POST)
@@ -744,6 +1056,7 @@ class OrderRequest(BaseModel):
     """
     session_id: str
     order_quantity: int
+    include_components: bool = False
 
 
 class OrderResponse(BaseModel):
@@ -764,5 +1077,7 @@ class OrderResponse(BaseModel):
         Student uses this to understand consequences of their order decision.
         Game state updated with new round and cumulative profits.
     """
-    state: GameStateResponse
+    model_config = ConfigDict(frozen=True)
+
+    state: GameStateDeltaResponse
     round_output: RoundOutputData
@@ -3,19 +3,130 @@ AI client initialization and access.
 This module handles OpenAI and DeepSeek client setup.
 """
 
+import asyncio
+import logging
 import os
-from openai import OpenAI
+from importlib.util import find_spec
+from typing import Awaitable, Callable, Sequence, TypeVar
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
 # AI client for negotiation chat (Step 3)
 # Supports both OpenAI and DeepSeek via OpenRouter
 # Priority: OpenAI if OPENAI_API_KEY is set, otherwise DeepSeek via OpenRouter if OPENROUTER_API_KEY is set
 openai_client = None
 deepseek_client = None
+# Async twins of the clients above, for code running on the event loop (e.g. /ai/status)
+openai_async_client = None
+deepseek_async_client = None
 ai_provider = None  # "openai" or "deepseek"
+# Connection pool shared by the async clients (created with the first one)
+async_http_client = None
+
+
+def _shared_async_http_client():
+    """
+    Returns the httpx client shared by the async AI clients, creating it on first use.
+    
+    Inputs:
+        None.
+    
+    What happens:
+        Builds one openai.DefaultAsyncHttpxClient (the SDK's default timeouts and
+        connection limits) and reuses it for every AsyncOpenAI client.
+        Enables HTTP/2 when the optional h2 package is installed (pip install
+        "httpx[http2]"), so concurrent requests to the provider share one TLS
+        connection instead of opening one each.
+    
+    Output:
+        Returns the shared async httpx client.
+    
+    Context:
+        Used while initializing the clients below; closed by close_ai_clients()
+        when the app shuts down.
+    """
+    global async_http_client
+    if async_http_client is None:
+        from openai import DefaultAsyncHttpxClient
+        async_http_client = DefaultAsyncHttpxClient(http2=find_spec("h2") is not None)
+    return async_http_client
+
+
+async def close_ai_clients() -> None:
+    """
+    Closes the shared async connection pool, if one was created.
+    
+    Context:
+        Called from the FastAPI lifespan on shutdown so open keepalive
+        connections are closed cleanly.
+    """
+    if async_http_client is not None:
+        await async_http_client.aclose()
+
+
+
+async def request_in_preference_order(
+    request: Callable[[str], Awaitable[T]],
+    models: Sequence[str],
+) -> T:
+    """
+    Asks the candidate models for a reply and returns the most preferred model's answer.
+    
+    Inputs:
+        request: Coroutine function that sends one request to the given model and
+            returns its reply (raising if the request fails or the reply is unusable).
+        models: Model names, most preferred first.
+    
+    What happens:
+        Sends the request to every free model (OpenRouter's ":free" suffix) at once.
+        Waits on them in preference order: the first model that answers wins as soon
+        as every model ahead of it has failed, so a slow rate-limited model only delays
+        the result when it is the one that will be used. The other requests are cancelled.
+        Paid models are asked only after every free model failed, one at a time in
+        order, because cancelling a request does not cancel its charge.
+    
+    Output:
+        Returns the winning reply. Raises the last error if every model failed.
+    
+    Context:
+        Used by the DeepSeek chat and proposal evaluation calls. With a single model
+        (OpenAI), this is just one awaited request.
+    """
+    free_models = [model for model in models if model.endswith(":free")]
+    paid_models = [model for model in models if not model.endswith(":free")]
+    last_error: Exception | None = None
+    
+    tasks = [asyncio.create_task(request(model)) for model in free_models]
+    try:
+        for model, task in zip(free_models, tasks):
+            try:
+                return await task
+            except Exception as e:
+                last_error = e
+                logger.warning("AI request to %s failed: %s", model, e)
+    finally:
+        # Stop the requests that are no longer needed (no-op for finished tasks);
+        # gathering them also consumes errors of requests that lost the race
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    for model in paid_models:
+        try:
+            return await request(model)
+        except Exception as e:
+            last_error = e
+            logger.warning("AI request to %s failed: %s", model, e)
+    
+    if last_error is None:
+        raise ValueError("No models to try")
+    raise last_error
 
 # Initialize OpenAI client (if API key is provided)
 openai_key = os.getenv("OPENAI_API_KEY")
@@ -24,7 +135,10 @@ if openai_key and openai_key.strip() and not openai_key.startswith("sk-your-"):
     if "your" in openai_key.lower() or "here" in openai_key.lower() or len(openai_key) < 20:
         print("WARNING: OPENAI_API_KEY appears to be a placeholder. Please set a real API key in .env file.")
     else:
+        # openai (and httpx) is only imported when a provider is configured
+        from openai import AsyncOpenAI, OpenAI
         openai_client = OpenAI(api_key=openai_key)
+        openai_async_client = AsyncOpenAI(api_key=openai_key, http_client=_shared_async_http_client())
         ai_provider = "openai"
         print("OpenAI client initialized for negotiation chat")
 
@@ -36,10 +150,16 @@ if not openai_client:
         if "your" in openrouter_key.lower() or "here" in openrouter_key.lower() or len(openrouter_key) < 20:
             print("WARNING: OPENROUTER_API_KEY appears to be a placeholder. Please set a real API key in .env file.")
         else:
+            from openai import AsyncOpenAI, OpenAI
             deepseek_client = OpenAI(
                 api_key=openrouter_key,
                 base_url="https://openrouter.ai/api/v1"
             )
+            deepseek_async_client = AsyncOpenAI(
+                api_key=openrouter_key,
+                base_url="https://openrouter.ai/api/v1",
+                http_client=_shared_async_http_client(),
+            )
             ai_provider = "deepseek"
             print("DeepSeek client initialized via OpenRouter for negotiation chat")
 
@@ -2,16 +2,106 @@
 AI service for generating chat responses and detecting agreement in negotiations.
 """
 
-from typing import Any
-import json
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from typing import Any, Iterator
+import logging
 import re
-import statistics
+
+import orjson
 
 from simulation.core import Contract, GameState, get_current_params, get_current_history
-from app.services.ai_client import openai_client, deepseek_client, ai_provider
+from app.services.ai_client import (
+    openai_client,
+    deepseek_client,
+    openai_async_client,
+    deepseek_async_client,
+    ai_provider,
+    request_in_preference_order,
+)
+from app.schemas import AIChatReply, AIContractTerms
 from app.services.config_service import load_negotiation_config
+from app.services.game_service import get_history_summary
+
+logger = logging.getLogger(__name__)
+
+# Allowed values for contracts extracted from AI responses (frozensets for O(1) membership)
+VALID_CONTRACT_TYPES = frozenset(("buyback", "revenue_sharing", "hybrid"))
+VALID_CAP_TYPES = frozenset(("fraction", "unit"))
+
+# Reply used when no AI provider is configured
+NO_AI_PROVIDER_MESSAGE = "I'm open to discussing contract terms. What would you like to adjust?"
+
+# Phrases that might indicate the student agrees to terms; matched anywhere in the
+# lowercased message (so "accept" also catches "acceptable"), as one compiled alternation
+AGREEMENT_INDICATORS = (
+    "sounds good", "that works", "yes", "yeah", "ok", "okay", "sure",
+    "lock in", "lock it in", "accept", "deal", "agreed", "let's proceed",
+)
+AGREEMENT_PATTERN = re.compile("|".join(map(re.escape, AGREEMENT_INDICATORS)))
+
+# Markdown code fences the AI sometimes wraps its JSON reply in
+FENCE_OPEN_PATTERN = re.compile(r'^```(?:json)?\s*', re.MULTILINE)
+FENCE_CLOSE_PATTERN = re.compile(r'```\s*$', re.MULTILINE)
+
+# Punctuation ignored when matching student messages in the reply cache: quotes are
+# dropped ("what's" == "whats"), other marks become spaces (a period only when it
+# does not sit between two digits)
+CACHE_DROPPED_QUOTES = str.maketrans("", "", "'\"`")
+CACHE_IGNORED_PUNCTUATION_PATTERN = re.compile(r'[!?,;:]+|\.(?!\d)|(?<!\d)\.')
+
+# Structured-output schema for OpenAI chat replies, mirroring AIChatReply / AIContractTerms.
+# "response" comes first so stream_chat_response() can show it while the rest arrives.
+_AI_CONTRACT_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "wholesale_price": {"type": "number"},
+        "buyback_price": {"type": "number"},
+        "contract_length": {"type": "integer"},
+        "cap_type": {"type": "string", "enum": sorted(VALID_CAP_TYPES)},
+        "cap_value": {"type": "number"},
+        "contract_type": {"type": "string", "enum": sorted(VALID_CONTRACT_TYPES)},
+        "revenue_share": {"type": "number"},
+    },
+    "required": [
+        "wholesale_price", "buyback_price", "contract_length", "cap_type",
+        "cap_value", "contract_type", "revenue_share",
+    ],
+    "additionalProperties": False,
+}
+CHAT_REPLY_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "negotiation_reply",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "response": {"type": "string"},
+                "contract": {"anyOf": [_AI_CONTRACT_JSON_SCHEMA, {"type": "null"}]},
+                "negotiation_complete": {"type": "boolean"},
+            },
+            "required": ["response", "contract", "negotiation_complete"],
+            "additionalProperties": False,
+        },
+    },
+}
 
-def generate_chat_response(
+# Chat history sent to the AI: at most this many recent messages, and only as many
+# as fit in the character budget (~4 characters per token, so roughly 1500 tokens)
+CHAT_HISTORY_MAX_MESSAGES = 10
+CHAT_HISTORY_CHAR_BUDGET = 6000
+
+# Upper bound on remembered plain chat replies (least recently used dropped beyond this)
+REPLY_CACHE_MAX_COUNT = 1024
+
+# (history tuple, its "recent demand" prompt text); the history is replaced by a new
+# tuple whenever it changes, so an identity check is enough (like game_service's summary)
+_recent_history_text_cache: tuple[tuple[int, ...], str] | None = None
+
+
+async def generate_chat_response(
     chat_history: list[dict[str, str]],
     current_draft_contract: Contract | None,
     game_state: GameState | None = None,
@@ -31,7 +121,9 @@ def generate_chat_response(
         Builds a system prompt with game context, demand history, and negotiation constraints.
         Checks if student's message might indicate agreement.
         If agreement likely, adds explicit agreement check question to prompt.
-        Sends conversation history and prompt to AI.
+        Sends conversation history and prompt to AI; for DeepSeek the free models are
+        asked concurrently and the most preferred usable reply wins (the rest are
+        cancelled); the paid model is only asked if every free model fails.
         Parses AI response to extract message and any JSON contract.
         Removes technical markers (NEGOTIATION_COMPLETE, CONTRACT_JSON) from message.
         Cleans the message (removes markdown, emojis).
@@ -45,41 +137,314 @@ def generate_chat_response(
     
     Context:
         Called by negotiation_chat endpoint to generate AI supplier responses.
+        Awaits the async AI clients, so a slow reply does not tie up a worker thread.
         Provides educational, conversational negotiation experience.
         Can detect when student agrees and create draft contracts automatically.
     """
+    prepared = _prepare_chat_call(
+        chat_history, current_draft_contract, game_state, initial_contract_type, use_async=True
+    )
+    if prepared is None:
+        # Fallback to simple responses if no AI provider is configured
+        return {
+            "message": NO_AI_PROVIDER_MESSAGE,
+            "draft_contract": None
+        }
+    client, model_name, models_to_try, messages, request_options, cache_key = prepared
+    
+    cached = _cached_reply(cache_key)
+    if cached is not None:
+        return cached
+    
+    try:
+        # The free DeepSeek models are asked at once and the preferred one that answers
+        # wins; the paid model is only asked if both fail (see request_in_preference_order)
+        ai_message = await request_in_preference_order(
+            lambda try_model: _request_reply(client, try_model, messages, request_options),
+            models_to_try,
+        )
+        
+        reply, parsed = _parse_ai_reply(ai_message, current_draft_contract, game_state)
+        if parsed:
+            _remember_reply(cache_key, reply)
+        return reply
+    except Exception as e:
+        return _fallback_reply(e, chat_history, current_draft_contract, model_name, messages)
+
+
+async def _request_reply(
+    client: Any,
+    model: str,
+    messages: list[dict[str, str]],
+    request_options: dict[str, Any],
+) -> str:
+    """
+    Sends one chat completion request and returns the reply text.
+    
+    Inputs:
+        client: Async AI client from _prepare_chat_call().
+        model: Model to ask.
+        messages, request_options: As returned by _prepare_chat_call().
+    
+    Output:
+        Returns the non-empty reply text. Raises ValueError naming the model if
+        the request fails or the reply has no choices or no content.
+    
+    Context:
+        generate_chat_response() runs one of these per candidate model
+        (through request_in_preference_order).
+    """
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=350,
+            **request_options,
+        )
+    except Exception as e:
+        raise ValueError(f"Model {model}: {e}") from e
+    
+    # Handle response - check if content exists
+    if not hasattr(response, 'choices') or len(response.choices) == 0:
+        raise ValueError(f"Model {model} returned no choices")
+    
+    message_obj = response.choices[0].message
+    ai_message = message_obj.content if hasattr(message_obj, 'content') else None
+    if not ai_message or not ai_message.strip():
+        finish_reason = getattr(response.choices[0], 'finish_reason', None)
+        raise ValueError(f"Model {model} returned empty response (finish_reason: {finish_reason})")
+    return ai_message
+
+
+def stream_chat_response(
+    chat_history: list[dict[str, str]],
+    current_draft_contract: Contract | None,
+    game_state: GameState | None = None,
+    initial_contract_type: str | None = None,
+) -> Iterator[tuple[str, Any]]:
+    """
+    Streaming version of generate_chat_response() for the SSE chat endpoint.
+    
+    Inputs:
+        Same as generate_chat_response().
+    
+    What happens:
+        Builds the same prompt as generate_chat_response().
+        Calls the AI with stream=True and collects the reply as it arrives.
+        While streaming, extracts the text of the reply's "response" JSON field
+        and yields it piece by piece (the raw JSON is never shown to the student).
+        For DeepSeek, moves on to the next model only if a model fails before
+        sending any text (switching later would garble what was already shown).
+        After the stream ends, parses the full reply exactly like the non-streaming
+        path (agreement detection, draft contract extraction).
+    
+    Output:
+        Yields ("delta", text) tuples while the reply streams in, then one
+        ("final", result) tuple where result has the same message/draft_contract
+        keys as generate_chat_response(). The final message is authoritative
+        (it may be a fallback if the reply could not be parsed).
+    
+    Context:
+        Used by /game/negotiate/chat/stream so students see the supplier's reply
+        after the first tokens instead of after the whole AI response.
+    """
+    prepared = _prepare_chat_call(chat_history, current_draft_contract, game_state, initial_contract_type)
+    if prepared is None:
+        yield "delta", NO_AI_PROVIDER_MESSAGE
+        yield "final", {"message": NO_AI_PROVIDER_MESSAGE, "draft_contract": None}
+        return
+    client, model_name, models_to_try, messages, request_options, cache_key = prepared
+    
+    cached = _cached_reply(cache_key)
+    if cached is not None:
+        yield "delta", cached["message"]
+        yield "final", cached
+        return
+    
+    try:
+        ai_message = None
+        last_error = None
+        
+        for try_model in models_to_try:
+            parts = []
+            visible = _ResponseFieldStream()
+            try:
+                stream = client.chat.completions.create(
+                    model=try_model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=350,
+                    stream=True,
+                    **request_options,
+                )
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    text = visible.feed(delta)
+                    if text:
+                        yield "delta", text
+            except Exception as e:
+                last_error = f"Model {try_model}: {e}"
+                # Text already shown can't be taken back, so only retry before the first token
+                if parts or try_model == models_to_try[-1]:
+                    raise
+                logger.warning("DeepSeek: %s failed before streaming, trying next model", last_error)
+                continue
+            
+            ai_message = "".join(parts)
+            if ai_message.strip():
+                break
+            last_error = f"Model {try_model} returned empty response"
+        
+        if not ai_message or not ai_message.strip():
+            raise ValueError(f"All models failed. Last error: {last_error}")
+        
+        reply, parsed = _parse_ai_reply(ai_message, current_draft_contract, game_state)
+        if parsed:
+            _remember_reply(cache_key, reply)
+        yield "final", reply
+    except Exception as e:
+        yield "final", _fallback_reply(e, chat_history, current_draft_contract, model_name, messages)
+
+
+# Opening of the reply's "response" field, e.g. {"response": "Hello...
+_RESPONSE_FIELD_START = re.compile(r'"response"\s*:\s*"')
+# Single-character JSON string escapes
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class _ResponseFieldStream:
+    """
+    Incrementally decodes the "response" string field of a JSON reply being streamed.
+    
+    feed() takes the next chunk of raw model output and returns the newly
+    available characters of the field's value (escapes decoded). Incomplete
+    escape sequences at the end of a chunk are held back until the next chunk.
+    Everything outside the field (contract JSON, code fences) is ignored.
+    """
+    
+    def __init__(self) -> None:
+        self.text = ""
+        self.pos: int | None = None  # Index of the next undecoded character of the field value
+        self.done = False
+    
+    def feed(self, chunk: str) -> str:
+        self.text += chunk
+        if self.done:
+            return ""
+        if self.pos is None:
+            match = _RESPONSE_FIELD_START.search(self.text)
+            if not match:
+                return ""
+            self.pos = match.end()
+        
+        text = self.text
+        out = []
+        i = self.pos
+        while i < len(text):
+            char = text[i]
+            if char == '"':
+                # Unescaped quote ends the field
+                self.done = True
+                i += 1
+                break
+            if char != "\\":
+                out.append(char)
+                i += 1
+                continue
+            if i + 1 >= len(text):
+                break  # Escape continues in the next chunk
+            escape = text[i + 1]
+            if escape != "u":
+                out.append(_JSON_ESCAPES.get(escape, escape))
+                i += 2
+                continue
+            if i + 6 > len(text):
+                break
+            try:
+                code = int(text[i + 2:i + 6], 16)
+            except ValueError:
+                i += 6
+                continue
+            if 0xD800 <= code < 0xDC00:
+                # High surrogate (e.g. emoji): combine with the following \uXXXX low surrogate
+                if i + 12 > len(text):
+                    break
+                try:
+                    low = int(text[i + 8:i + 12], 16) if text[i + 6:i + 8] == "\\u" else 0
+                except ValueError:
+                    low = 0
+                if 0xDC00 <= low < 0xE000:
+                    out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                else:
+                    i += 6  # Unpaired surrogate - drop it
+                continue
+            if not 0xDC00 <= code < 0xE000:
+                out.append(chr(code))
+            i += 6
+        self.pos = i
+        return "".join(out)
+
+def _prepare_chat_call(
+    chat_history: list[dict[str, str]],
+    current_draft_contract: Contract | None,
+    game_state: GameState | None,
+    initial_contract_type: str | None,
+    use_async: bool = False,
+) -> tuple[Any, str, list[str], list[dict[str, str]], dict[str, Any], bytes | None] | None:
+    """
+    Picks the AI client and builds the message list for a negotiation chat call.
+    
+    Inputs:
+        Same as generate_chat_response(), plus:
+        use_async: Return the AsyncOpenAI client instead of the sync one.
+    
+    What happens:
+        Determines which AI client to use (OpenAI or DeepSeek).
+        Builds a system prompt with game context, demand history, and negotiation constraints.
+        Checks if student's message might indicate agreement; if so, appends an explicit
+        agreement check question to the prompt.
+        Lists the models to try in order (several for DeepSeek, in case the free one fails).
+    
+    Output:
+        Returns (client, model_name, models_to_try, messages, request_options, cache_key),
+        or None if no AI provider is configured. request_options are extra keyword arguments
+        for chat.completions.create(); cache_key is the reply cache key (see _reply_cache_key).
+    
+    Context:
+        Shared by generate_chat_response() and stream_chat_response() so both send the same prompt.
+        The rendered template goes first and does not change between turns or rounds, so
+        the provider's automatic prompt caching can reuse it; the per-round game status
+        follows as a separate system message.
+    """
     # Determine which client to use
     client = None
     model_name = None
     
     if ai_provider == "openai" and openai_client:
-        client = openai_client
+        client = openai_async_client if use_async else openai_client
         model_name = "gpt-4o-mini"  # Using cost-effective model
     elif ai_provider == "deepseek" and deepseek_client:
-        client = deepseek_client
+        client = deepseek_async_client if use_async else deepseek_client
         # Use free model - will fallback in error handling if needed
         model_name = "deepseek/deepseek-r1-0528:free"  # Free DeepSeek model via OpenRouter
     
     if not client:
-        # Fallback to simple responses if no AI provider is configured
-        return {
-            "message": "I'm open to discussing contract terms. What would you like to adjust?",
-            "draft_contract": None
-        }
+        # No AI provider configured - caller falls back to a simple response
+        return None
     
     # Build system prompt with game context
     params = get_current_params()
     history = get_current_history()
     
-    # Calculate demand statistics
-    if history:
-        demand_min = min(history)
-        demand_max = max(history)
-        demand_avg = statistics.mean(history)
-        demand_count = len(history)
-    else:
-        demand_min = demand_max = demand_avg = 0
-        demand_count = 0
+    # Demand statistics are computed once per loaded history (see get_history_summary)
+    demand_stats = get_history_summary()
     
     # Get game progress info if available
     game_context = ""
@@ -98,12 +463,17 @@ Current Game Status:
     fixed_contract_type = initial_contract_type or "buyback"
     
     # Build system prompt from template
-    recent_history_str = ', '.join(map(str, history[-10:])) if history else "0"
+    recent_history_str = _recent_history_text(history)
     
     # Format contract types list for prompt
     contract_types_str = ', '.join(neg_config.contract_types_available)
     
-    system_prompt = neg_config.system_prompt_template.format(
+    # Game status changes every round, so it is sent after the cacheable template
+    # instead of in the middle of it (only if the template asks for it at all)
+    split_game_context = "{game_context}" in neg_config.system_prompt_template
+    
+    # (the template is parsed once per loaded config, see NegotiationConfigData.system_prompt_parts)
+    system_prompt = neg_config.render_system_prompt(
         contract_type=fixed_contract_type,
         retail_price=params.retail_price,
         supplier_cost=params.supplier_cost,
@@ -111,12 +481,12 @@ Current Game Status:
         supplier_salvage_value=params.supplier_salvage_value,
         return_shipping_buyer=params.return_shipping_buyer,
         return_handling_supplier=params.return_handling_supplier,
-        demand_count=demand_count,
-        demand_avg=demand_avg,
-        demand_min=demand_min,
-        demand_max=demand_max,
+        demand_count=demand_stats.count,
+        demand_avg=demand_stats.mean,
+        demand_min=demand_stats.min,
+        demand_max=demand_stats.max,
         recent_history=recent_history_str,
-        game_context=game_context,
+        game_context="" if split_game_context else game_context,
         length_min=neg_config.length_min,
         length_max=neg_config.length_max,
         cap_value_min=neg_config.cap_value_min,
@@ -135,16 +505,14 @@ Current Game Status:
             last_student_msg = msg.get("content", "").lower()
             break
     
-    # List of phrases that might indicate student agrees to terms
-    agreement_indicators = [
-        "sounds good", "that works", "yes", "yeah", "ok", "okay", "sure",
-        "lock in", "lock it in", "accept", "deal", "agreed", "let's proceed"
-    ]
-    might_be_agreement = last_student_msg and any(phrase in last_student_msg for phrase in agreement_indicators)
+    # One scan for all agreement phrases (see AGREEMENT_PATTERN)
+    might_be_agreement = bool(last_student_msg and AGREEMENT_PATTERN.search(last_student_msg))
     
-    # Build conversation history for AI (only last 10 messages to stay within token limits)
+    # Build conversation history for AI (recent messages within a size budget, see _recent_chat_history)
     messages = [{"role": "system", "content": system_prompt}]
-    for msg in chat_history[-10:]:  # Last 10 messages for context
+    if split_game_context and game_context:
+        messages.append({"role": "system", "content": game_context.strip()})
+    for msg in _recent_chat_history(chat_history):
         role = "user" if msg["role"] == "student" else "assistant"
         messages.append({"role": role, "content": msg["content"]})
     
@@ -173,178 +541,321 @@ Extract ALL discussed terms from the conversation. The contract type is FIXED as
 If NO, respond with JSON where "negotiation_complete" is false and "contract" is null."""
         messages.append({"role": "user", "content": agreement_check_question})
     
+    # For DeepSeek, try alternative models if the free one fails
+    models_to_try = [model_name]
+    if ai_provider == "deepseek":
+        models_to_try = [
+            "deepseek/deepseek-r1-0528:free",
+            "deepseek/deepseek-chat:free",
+            "deepseek/deepseek-chat",
+        ]
+    
+    # OpenAI routes requests with the same key to the same prompt cache;
+    # the template prefix only differs by contract type
+    # OpenAI also enforces the reply shape with structured outputs (DeepSeek models on
+    # OpenRouter don't all support it, so their replies still rely on the prompt)
+    request_options: dict[str, Any] = {}
+    if ai_provider == "openai":
+        request_options["prompt_cache_key"] = f"negotiation-{fixed_contract_type}"
+        request_options["response_format"] = CHAT_REPLY_RESPONSE_FORMAT
+    
+    cache_key = _reply_cache_key(messages, current_draft_contract, might_be_agreement)
+    return client, model_name, models_to_try, messages, request_options, cache_key
+
+
+# Plain chat replies by hash of the exact messages sent (see _reply_cache_key).
+# A threading lock guards it because stream_chat_response() runs in the threadpool.
+_REPLY_CACHE: "OrderedDict[bytes, dict[str, Any]]" = OrderedDict()
+_REPLY_CACHE_LOCK = Lock()
+
+
+def _recent_history_text(history: tuple[int, ...]) -> str:
+    """
+    Returns the last 10 demand values as the prompt's "Recent demand history" text.
+    
+    Joined once per loaded history and reused for every chat turn ("0" if empty).
+    """
+    global _recent_history_text_cache
+    if _recent_history_text_cache is not None and _recent_history_text_cache[0] is history:
+        return _recent_history_text_cache[1]
+    text = ', '.join(map(str, history[-10:])) if history else "0"
+    _recent_history_text_cache = (history, text)
+    return text
+
+
+def _recent_chat_history(chat_history: list[dict[str, str]]) -> list[dict[str, str]]:
+    """
+    Returns the tail of the chat history that is sent to the AI.
+    
+    Inputs:
+        chat_history: The full negotiation chat history.
+    
+    What happens:
+        Walks back from the newest message, keeping messages until either
+        CHAT_HISTORY_MAX_MESSAGES are kept or the next one would push the total
+        content length past CHAT_HISTORY_CHAR_BUDGET. The newest message is
+        always kept.
+    
+    Output:
+        Returns the kept messages, oldest first.
+    
+    Context:
+        A few long messages no longer fill the context window, while short
+        exchanges still send the full 10-message window. Characters stand in for
+        tokens (no tokenizer dependency); the budget is conservative for English.
+    """
+    kept = 0
+    total = 0
+    for msg in reversed(chat_history[-CHAT_HISTORY_MAX_MESSAGES:]):
+        total += len(msg["content"])
+        if kept and total > CHAT_HISTORY_CHAR_BUDGET:
+            break
+        kept += 1
+    return chat_history[len(chat_history) - kept:]
+
+
+def _reply_cache_key(
+    messages: list[dict[str, str]],
+    current_draft_contract: Contract | None,
+    might_be_agreement: bool,
+) -> bytes | None:
+    """
+    Builds the reply cache key for one chat call.
+    
+    Inputs:
+        messages: The messages about to be sent (from _prepare_chat_call()).
+        current_draft_contract: Existing draft contract.
+        might_be_agreement: Whether the student's last message looks like agreement.
+    
+    What happens:
+        Hashes the messages with BLAKE2b. They already contain everything the reply
+        depends on: the rendered system prompt (parameters, demand history, contract
+        type, game status) and the recent chat messages.
+        Student messages are hashed in normalized form (see _normalize_student_text),
+        so trivially different phrasings such as "Price?" and "price" share a key.
+    
+    Output:
+        Returns the 16-byte digest (stable across processes), or None if a draft
+        contract exists or the student may have agreed (replies are then part of
+        finalizing a contract and are not cached).
+    
+    Context:
+        Common student questions ("what's the price?") at the same point of a
+        game get the same reply without another AI round-trip.
+    """
+    if current_draft_contract is not None or might_be_agreement:
+        return None
+    payload = orjson.dumps([
+        (msg["role"], _normalize_student_text(msg["content"]) if msg["role"] == "user" else msg["content"])
+        for msg in messages
+    ])
+    return blake2b(payload, digest_size=16).digest()
+
+
+def _normalize_student_text(text: str) -> str:
+    """
+    Lowercases a student message and drops punctuation that does not change its meaning.
+    
+    Quotes, ! ? , ; : and sentence-ending periods are removed and whitespace is
+    collapsed; digits, $ and decimal points are kept, so "$25.50" and "25" stay distinct.
+    """
+    text = CACHE_IGNORED_PUNCTUATION_PATTERN.sub(" ", text.lower().translate(CACHE_DROPPED_QUOTES))
+    return " ".join(text.split())
+
+
+def _cached_reply(cache_key: bytes | None) -> dict[str, Any] | None:
+    """Returns a copy of the remembered reply for cache_key, or None on a miss."""
+    if cache_key is None:
+        return None
+    with _REPLY_CACHE_LOCK:
+        reply = _REPLY_CACHE.get(cache_key)
+        if reply is None:
+            return None
+        _REPLY_CACHE.move_to_end(cache_key)
+    return dict(reply)
+
+
+def _remember_reply(cache_key: bytes | None, reply: dict[str, Any]) -> None:
+    """
+    Stores a parsed reply for later identical calls.
+    
+    Only replies without a draft contract are kept: a reply that proposes or
+    confirms terms changes the negotiation state and must come from the AI.
+    Callers only pass replies that _parse_ai_reply() parsed; fallback replies
+    (after errors or unparseable output) are never stored.
+    """
+    if cache_key is None or reply.get("draft_contract") is not None:
+        return
+    with _REPLY_CACHE_LOCK:
+        _REPLY_CACHE[cache_key] = dict(reply)
+        _REPLY_CACHE.move_to_end(cache_key)
+        if len(_REPLY_CACHE) > REPLY_CACHE_MAX_COUNT:
+            _REPLY_CACHE.popitem(last=False)
+
+
+def _parse_ai_reply(
+    ai_message: str,
+    current_draft_contract: Contract | None,
+    game_state: GameState | None,
+) -> tuple[dict[str, Any], bool]:
+    """
+    Turns the raw AI reply into the chat message and an optional draft contract.
+    
+    Inputs:
+        ai_message: The full text returned by the model (expected to be JSON).
+        current_draft_contract: Existing draft contract, kept if the reply cannot be parsed.
+        game_state: Current game state (for the fixed initial contract type).
+    
+    What happens:
+        Strips markdown code fences (if any) and parses the JSON reply into AIChatReply.
+        Extracts the "response" message and validates the "contract" object as AIContractTerms.
+        Builds a Contract from the contract terms, clamped to the negotiation config ranges.
+    
+    Output:
+        Returns (reply, parsed): reply is a dictionary with message and draft_contract
+        (None if no valid contract); parsed is False if the reply was not valid JSON and
+        a "please rephrase" message was substituted.
+    
+    Context:
+        Shared by generate_chat_response() and stream_chat_response().
+    """
+    # Parse AI response - expects JSON structure: {"response": "...", "contract": {...} or null, "negotiation_complete": true/false}
+    # Clean up the response by removing any markdown code blocks that might wrap the JSON
+    # (structured-output replies from OpenAI never have them, so the regexes are skipped)
+    ai_message_clean = ai_message.strip()
+    if "```" in ai_message_clean:
+        ai_message_clean = FENCE_OPEN_PATTERN.sub('', ai_message_clean)
+        ai_message_clean = FENCE_CLOSE_PATTERN.sub('', ai_message_clean)
+        ai_message_clean = ai_message_clean.strip()
+    
     try:
-        # For DeepSeek, try alternative models if the free one fails
-        models_to_try = [model_name]
-        if ai_provider == "deepseek":
-            models_to_try = [
-                "deepseek/deepseek-r1-0528:free",
-                "deepseek/deepseek-chat:free",
-                "deepseek/deepseek-chat",
-            ]
-        
-        ai_message = None
-        last_error = None
-        
-        for try_model in models_to_try:
-            try:
-                response = client.chat.completions.create(
-                    model=try_model,
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=350,
-                )
-                
-                # Handle response - check if content exists
-                if not hasattr(response, 'choices') or len(response.choices) == 0:
-                    last_error = f"Model {try_model} returned no choices"
-                    if try_model != models_to_try[-1]:  # Not the last model
-                        continue
-                    raise ValueError(last_error)
-                
-                message_obj = response.choices[0].message
-                ai_message = message_obj.content if hasattr(message_obj, 'content') else None
-                
-                # Validate response
-                if ai_message and ai_message.strip():
-                    # Success - use this response
-                    break
-                else:
-                    # Empty response - try next model if available
-                    finish_reason = getattr(response.choices[0], 'finish_reason', None)
-                    last_error = f"Model {try_model} returned empty response (finish_reason: {finish_reason})"
-                    if try_model != models_to_try[-1]:  # Not the last model
-                        print(f"DeepSeek: Trying alternative model. {last_error}")
-                        continue
-                    raise ValueError(last_error)
-                    
-            except Exception as e:
-                error_str = str(e)
-                last_error = f"Model {try_model}: {error_str}"
-                # If it's a model not found error and we have more models to try, continue
-                if ("model" in error_str.lower() or "not found" in error_str.lower() or "404" in error_str) and try_model != models_to_try[-1]:
-                    print(f"DeepSeek: Model {try_model} not available, trying next model")
-                    continue
-                # Otherwise, re-raise if it's the last model
-                if try_model == models_to_try[-1]:
-                    raise
-                # Continue to next model
-                continue
+        # Parse and type-check the cleaned message in one pydantic-core pass
+        reply = AIChatReply.model_validate_json(ai_message_clean)
         
-        if not ai_message or not ai_message.strip():
-            raise ValueError(f"All models failed. Last error: {last_error}")
-        
-        # Parse AI response - expects JSON structure: {"response": "...", "contract": {...} or null, "negotiation_complete": true/false}
-        # Clean up the response by removing any markdown code blocks that might wrap the JSON
-        ai_message_clean = ai_message.strip()
-        ai_message_clean = re.sub(r'^```(?:json)?\s*', '', ai_message_clean, flags=re.MULTILINE)
-        ai_message_clean = re.sub(r'```\s*$', '', ai_message_clean, flags=re.MULTILINE)
-        ai_message_clean = ai_message_clean.strip()
+        # Extract fields from structured JSON response
+        cleaned_message = reply.response.strip()
+        json_contract = reply.contract
         
+        # Validate that response field exists and is not empty
+        if not cleaned_message:
+            raise ValueError("Empty response field in JSON")
+            
+    except ValueError:  # Includes pydantic's ValidationError for malformed JSON
+        # If JSON parsing fails, return a simple fallback message to maintain conversation flow
+        return {
+            "message": "I'm having trouble processing that. Could you rephrase your proposal?",
+            "draft_contract": current_draft_contract
+        }, False
+    
+    # Get initial contract type from game state (contract type cannot be changed during negotiation)
+    initial_ct = None
+    if game_state:
+        initial_ct = game_state.initial_contract_type
+    
+    # Create Contract object from JSON if present
+    draft_contract = None
+    if json_contract:
         try:
-            # Parse the cleaned message as JSON
-            response_data = json.loads(ai_message_clean)
+            params = get_current_params()
+            neg_config = load_negotiation_config()
+            # Coerces and type-checks all terms at once (raises ValidationError if malformed)
+            terms = AIContractTerms.model_validate(json_contract)
             
-            # Extract fields from structured JSON response
-            cleaned_message = response_data.get("response", "").strip()
-            json_contract = response_data.get("contract")
+            # Handle both "contract_length" and "length" keys for backward compatibility
+            contract_length = terms.contract_length or terms.length or neg_config.length_min
+            contract_type_to_use = initial_ct or "buyback"
             
-            # Validate that response field exists and is not empty
-            if not cleaned_message:
-                raise ValueError("Empty response field in JSON")
-                
-        except (json.JSONDecodeError, ValueError, KeyError, TypeError):
-            # If JSON parsing fails, return a simple fallback message to maintain conversation flow
-            return {
-                "message": "I'm having trouble processing that. Could you rephrase your proposal?",
-                "draft_contract": current_draft_contract
-            }
-        
-        # Get initial contract type from game state (contract type cannot be changed during negotiation)
-        initial_ct = None
-        if game_state:
-            initial_ct = game_state.initial_contract_type
-        
-        # Create Contract object from JSON if present
-        draft_contract = None
-        if json_contract:
-            try:
-                params = get_current_params()
-                neg_config = load_negotiation_config()
+            # Determine cap_type based on configuration (used when the AI leaves it out)
+            default_cap_type = "fraction"
+            if neg_config.cap_type_allowed == "unit":
+                default_cap_type = "unit"
+            
+            # Create Contract object from JSON data
+            draft_contract = Contract(
+                wholesale_price=terms.wholesale_price,
+                buyback_price=terms.buyback_price,
+                cap_type=terms.cap_type if terms.cap_type is not None else default_cap_type,
+                cap_value=terms.cap_value if terms.cap_value is not None else neg_config.cap_value_max,
+                length=contract_length,
+                contract_type=contract_type_to_use,
+                revenue_share=terms.revenue_share if terms.revenue_share is not None else neg_config.revenue_share_min,
+            )
+            
+            # Validate and clamp contract values to ensure they're within allowed ranges
+            if draft_contract.wholesale_price > 0 and draft_contract.buyback_price >= 0 and draft_contract.buyback_price < draft_contract.wholesale_price:
+                # Clamp contract length to valid range
+                draft_contract.length = max(neg_config.length_min, min(draft_contract.length, neg_config.length_max))
                 
-                # Handle both "contract_length" and "length" keys for backward compatibility
-                contract_length = json_contract.get("contract_length") or json_contract.get("length") or neg_config.length_min
-                contract_type_to_use = initial_ct or "buyback"
+                # Clamp cap_value based on cap_type
+                if draft_contract.cap_type == "fraction":
+                    draft_contract.cap_value = max(neg_config.cap_value_min, min(draft_contract.cap_value, neg_config.cap_value_max))
+                elif draft_contract.cap_type == "unit":
+                    draft_contract.cap_value = max(neg_config.cap_value_min, draft_contract.cap_value)
                 
-                # Determine cap_type based on configuration
-                default_cap_type = "fraction"
-                if neg_config.cap_type_allowed == "unit":
-                    default_cap_type = "unit"
-                elif neg_config.cap_type_allowed == "both":
-                    default_cap_type = json_contract.get("cap_type", "fraction")
+                # Clamp revenue_share to valid range
+                draft_contract.revenue_share = max(neg_config.revenue_share_min, min(draft_contract.revenue_share, neg_config.revenue_share_max))
                 
-                # Create Contract object from JSON data
-                draft_contract = Contract(
-                    wholesale_price=float(json_contract.get("wholesale_price", 0)),
-                    buyback_price=float(json_contract.get("buyback_price", 0)),
-                    cap_type=json_contract.get("cap_type", default_cap_type),
-                    cap_value=float(json_contract.get("cap_value", neg_config.cap_value_max)),
-                    length=int(contract_length),
-                    contract_type=contract_type_to_use,
-                    revenue_share=float(json_contract.get("revenue_share", neg_config.revenue_share_min)),
+                # Validate contract_type and cap_type are valid values
+                if draft_contract.contract_type not in VALID_CONTRACT_TYPES:
+                    draft_contract.contract_type = "buyback"
+                if draft_contract.cap_type not in VALID_CAP_TYPES:
+                    draft_contract.cap_type = "fraction"
+            else:
+                # Invalid contract values - discard it
+                logger.warning(
+                    "Invalid contract from JSON: wholesale=%s, buyback=%s",
+                    draft_contract.wholesale_price, draft_contract.buyback_price,
                 )
-                
-                # Validate and clamp contract values to ensure they're within allowed ranges
-                if draft_contract.wholesale_price > 0 and draft_contract.buyback_price >= 0 and draft_contract.buyback_price < draft_contract.wholesale_price:
-                    # Clamp contract length to valid range
-                    draft_contract.length = max(neg_config.length_min, min(draft_contract.length, neg_config.length_max))
-                    
-                    # Clamp cap_value based on cap_type
-                    if draft_contract.cap_type == "fraction":
-                        draft_contract.cap_value = max(neg_config.cap_value_min, min(draft_contract.cap_value, neg_config.cap_value_max))
-                    elif draft_contract.cap_type == "unit":
-                        draft_contract.cap_value = max(neg_config.cap_value_min, draft_contract.cap_value)
-                    
-                    # Clamp revenue_share to valid range
-                    draft_contract.revenue_share = max(neg_config.revenue_share_min, min(draft_contract.revenue_share, neg_config.revenue_share_max))
-                    
-                    # Validate contract_type and cap_type are valid values
-                    if draft_contract.contract_type not in ("buyback", "revenue_sharing", "hybrid"):
-                        draft_contract.contract_type = "buyback"
-                    if draft_contract.cap_type not in ("fraction", "unit"):
-                        draft_contract.cap_type = "fraction"
-                else:
-                    # Invalid contract values - discard it
-                    print(f"Invalid contract from JSON: wholesale={draft_contract.wholesale_price}, buyback={draft_contract.buyback_price}")
-                    draft_contract = None
-            except (ValueError, KeyError, TypeError) as e:
-                # Error creating contract from JSON - log and continue without draft contract
-                print(f"Error creating contract from JSON: {e}")
                 draft_contract = None
-        
-        return {
-            "message": cleaned_message,
-            "draft_contract": draft_contract
-        }
-    except Exception as e:
-        # Better error logging for debugging
-        error_msg = str(e)
-        print(f"AI API error ({ai_provider}): {error_msg}")
-        print(f"Model: {model_name}")
-        print(f"Messages count: {len(messages)}")
-        
-        # Provide more helpful fallback that maintains conversation
-        fallback_responses = [
-            "I understand you're asking about contract terms. Could you be more specific about what you'd like to adjust?",
-            "Let me help you understand the contract structure. What specific term would you like to discuss?",
-            "I'm here to negotiate. What changes are you proposing to the contract?",
-        ]
-        
-        # Use a simple rotation based on message count to vary responses
-        fallback_index = len(chat_history) % len(fallback_responses)
-        
-        return {
-            "message": fallback_responses[fallback_index],
-            "draft_contract": current_draft_contract
-        }
+        except (ValueError, KeyError, TypeError) as e:
+            # Error creating contract from JSON - log and continue without draft contract
+            logger.warning("Error creating contract from JSON: %s", e)
+            draft_contract = None
+    
+    return {
+        "message": cleaned_message,
+        "draft_contract": draft_contract
+    }, True
+
+
+def _fallback_reply(
+    error: Exception,
+    chat_history: list[dict[str, str]],
+    current_draft_contract: Contract | None,
+    model_name: str,
+    messages: list[dict[str, str]],
+) -> dict[str, Any]:
+    """
+    Logs an AI call failure and returns a conversational fallback reply.
+    
+    Inputs:
+        error: The exception raised by the AI call or reply parsing.
+        chat_history: The chat so far (used to rotate between fallback messages).
+        current_draft_contract: Existing draft contract, kept unchanged.
+        model_name: The primary model that was requested (for logging).
+        messages: The messages sent to the AI (for logging).
+    
+    Output:
+        Returns a dictionary with a fallback message and the unchanged draft_contract.
+    """
+    # Better error logging for debugging
+    logger.error(
+        "AI API error (%s): %s (model: %s, messages: %d)",
+        ai_provider, error, model_name, len(messages),
+    )
+    
+    # Provide more helpful fallback that maintains conversation
+    fallback_responses = [
+        "I understand you're asking about contract terms. Could you be more specific about what you'd like to adjust?",
+        "Let me help you understand the contract structure. What specific term would you like to discuss?",
+        "I'm here to negotiate. What changes are you proposing to the contract?",
+    ]
+    
+    # Use a simple rotation based on message count to vary responses
+    fallback_index = len(chat_history) % len(fallback_responses)
+    
+    return {
+        "message": fallback_responses[fallback_index],
+        "draft_contract": current_draft_contract
+    }
 
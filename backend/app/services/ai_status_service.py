@@ -0,0 +1,412 @@
+"""
+AI provider status checks with short-lived result caching.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import logging
+import re
+import time
+
+from app.services.ai_client import (
+    openai_client,
+    deepseek_client,
+    openai_async_client,
+    deepseek_async_client,
+    ai_provider,
+)
+
+logger = logging.getLogger(__name__)
+
+# How long a probe result is reused before the provider is tested again (seconds).
+# Failures expire sooner so a recovered provider shows up quickly.
+STATUS_TTL_WORKING = 15.0
+STATUS_TTL_ERROR = 5.0
+
+# provider name -> (expires_at on the time.monotonic() clock, probe result fields, probe latency in ms)
+_status_cache: Dict[str, Tuple[float, Dict[str, Any], float]] = {}
+_status_locks: Dict[str, asyncio.Lock] = {"openai": asyncio.Lock(), "deepseek": asyncio.Lock()}
+
+# DeepSeek model circuit breakers: after BREAKER_FAILURE_THRESHOLD consecutive failures a
+# model is skipped for BREAKER_OPEN_SECONDS, then tried once more (half-open)
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_OPEN_SECONDS = 30.0
+# model name -> {"fails": consecutive failures, "open_until": time.monotonic() deadline}
+_model_breakers: Dict[str, Dict[str, float]] = {}
+
+# A rejected API key does not recover by retrying, so providers are not re-probed for this long
+AUTH_FAILURE_HOLD_SECONDS = STATUS_TTL_WORKING
+# provider name -> time.monotonic() deadline before which its key is still considered rejected
+_auth_rejected_until: Dict[str, float] = {}
+
+# Tiny prompt sent by every probe; built once and shared (the SDK only reads it)
+PROBE_MESSAGES = (
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Say OK if you can read this."},
+)
+
+# Error classification for probe failures (one regex search instead of chained substring checks)
+AUTH_ERROR_PATTERN = re.compile(r"invalid_api_key|401|Incorrect API key|Unauthorized", re.IGNORECASE)
+MODEL_ERROR_PATTERN = re.compile(r"model|not found|404", re.IGNORECASE)
+
+OPENAI_INVALID_KEY_MESSAGE = "Invalid API key. Please check your OPENAI_API_KEY in .env file. Make sure it's a real key from https://platform.openai.com/api-keys"
+DEEPSEEK_INVALID_KEY_MESSAGE = "Invalid API key. Please check your OPENROUTER_API_KEY in .env file. Get a key from https://openrouter.ai/keys"
+
+# Status report when no AI key is set at all (common in development); copied per request
+UNCONFIGURED_STATUS: Dict[str, Any] = {
+    "openai_configured": False,
+    "deepseek_configured": False,
+    "active_provider": None,
+    "openai_status": "not_configured",
+    "openai_message": "Not configured (set OPENAI_API_KEY)",
+    "openai_test_successful": False,
+    "deepseek_status": "not_configured",
+    "deepseek_message": "Not configured (set OPENROUTER_API_KEY)",
+    "deepseek_test_successful": False,
+}
+
+
+async def probe_openai() -> Dict[str, Any]:
+    """
+    Tests the OpenAI client with a tiny chat completion.
+
+    Inputs:
+        None (uses the global openai_async_client, which must be configured).
+
+    What happens:
+        Returns the invalid-key error right away if the key was rejected recently.
+        Otherwise sends a short "Say OK" prompt to gpt-4o-mini.
+        Classifies the outcome as working or error, with a helpful message for bad API keys.
+
+    Output:
+        Returns a dictionary with openai_status, openai_message, and openai_test_successful.
+
+    Context:
+        Called through get_cached_provider_status() so repeated /ai/status polls
+        do not each pay for a live API round trip.
+    """
+    result = {
+        "openai_status": "testing",
+        "openai_message": "",
+        "openai_test_successful": False,
+    }
+    if time.monotonic() < _auth_rejected_until.get("openai", 0.0):
+        result["openai_status"] = "error"
+        result["openai_message"] = OPENAI_INVALID_KEY_MESSAGE
+        return result
+
+    try:
+        test_response = await openai_async_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=PROBE_MESSAGES,
+            max_tokens=10,
+        )
+
+        test_message = test_response.choices[0].message.content
+        if test_message:
+            result["openai_status"] = "working"
+            result["openai_message"] = "OpenAI is working correctly"
+            result["openai_test_successful"] = True
+        else:
+            result["openai_status"] = "error"
+            result["openai_message"] = "OpenAI returned empty response"
+    except Exception as e:
+        result["openai_status"] = "error"
+        error_str = str(e)
+        # Provide more helpful error messages
+        if AUTH_ERROR_PATTERN.search(error_str):
+            result["openai_message"] = OPENAI_INVALID_KEY_MESSAGE
+            _auth_rejected_until["openai"] = time.monotonic() + AUTH_FAILURE_HOLD_SECONDS
+        else:
+            result["openai_message"] = f"OpenAI error: {error_str}"
+    return result
+
+
+async def probe_deepseek() -> Dict[str, Any]:
+    """
+    Tests the DeepSeek (OpenRouter) client against several model names at once.
+
+    Inputs:
+        None (uses the global deepseek_async_client, which must be configured).
+
+    What happens:
+        Returns the invalid-key error right away if the key was rejected recently.
+        Sends a short "Say OK" prompt to every candidate model whose circuit breaker
+        is closed, concurrently, and handles the answers as they arrive.
+        Keeps the preference order: as soon as the most preferred model still in the
+        running answers (or every model ahead of an answered one has failed), that
+        model wins and the remaining probes are cancelled, so a slow rate-limited
+        model does not hold up the check.
+        Skips models with open breakers, empty responses, or model-not-found errors.
+        Stops at an authentication error.
+        Updates the breaker of each model whose probe finished (reset on success,
+        count failures otherwise); cancelled probes leave their breaker unchanged.
+
+    Output:
+        Returns a dictionary with deepseek_status, deepseek_message, and deepseek_test_successful.
+
+    Context:
+        Called through get_cached_provider_status() so repeated /ai/status polls
+        do not each pay for up to three live API round trips.
+    """
+    result = {
+        "deepseek_status": "testing",
+        "deepseek_message": "",
+        "deepseek_test_successful": False,
+    }
+    now = time.monotonic()
+    if now < _auth_rejected_until.get("deepseek", 0.0):
+        result["deepseek_status"] = "error"
+        result["deepseek_message"] = DEEPSEEK_INVALID_KEY_MESSAGE
+        return result
+
+    # Try multiple model names in case the free one is unavailable
+    models_to_try = [
+        "deepseek/deepseek-r1-0528:free",
+        "deepseek/deepseek-chat:free",
+        "deepseek/deepseek-chat",
+    ]
+
+    models_to_test = [
+        model_name for model_name in models_to_try
+        if now >= _model_breakers.get(model_name, {}).get("open_until", 0.0)
+    ]
+    tasks = {
+        asyncio.create_task(deepseek_async_client.chat.completions.create(
+            model=model_name,
+            messages=PROBE_MESSAGES,
+            max_tokens=20,
+        )): model_name
+        for model_name in models_to_test
+    }
+    # model name -> response or exception, filled in as the probes finish
+    outcomes: Dict[str, Any] = {}
+    pending = set(tasks)
+
+    try:
+        while True:
+            last_error = None
+            # Every failed model attempt, logged together once all models have failed
+            attempts = []
+            # Walk the models in preference order over the results so far
+            for model_name in models_to_try:
+                if model_name not in models_to_test:
+                    last_error = f"Model {model_name}: skipped (circuit breaker open after repeated failures)"
+                    attempts.append(last_error)
+                    continue
+                if model_name not in outcomes:
+                    # A more preferred model is still running - wait for it
+                    break
+                test_response = outcomes[model_name]
+                if _is_usable_response(test_response):
+                    result["deepseek_status"] = "working"
+                    result["deepseek_message"] = f"DeepSeek is working correctly (using {model_name})"
+                    result["deepseek_test_successful"] = True
+                    return result
+                last_error = _probe_error(model_name, test_response)
+                attempts.append(last_error)
+                # If it's auth error, don't try other models
+                # (model-not-found and other errors move on to the next model)
+                if isinstance(test_response, Exception) and AUTH_ERROR_PATTERN.search(str(test_response)):
+                    result["deepseek_status"] = "error"
+                    result["deepseek_message"] = DEEPSEEK_INVALID_KEY_MESSAGE
+                    _auth_rejected_until["deepseek"] = time.monotonic() + AUTH_FAILURE_HOLD_SECONDS
+                    logger.warning("DeepSeek probe: API key rejected: %s", last_error)
+                    return result
+            else:
+                # Every model failed or was skipped
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                model_name = tasks[task]
+                test_response = task.exception() or task.result()
+                outcomes[model_name] = test_response
+                usable = _is_usable_response(test_response)
+                _record_breaker_result(model_name, usable)
+                if not usable:
+                    logger.debug("DeepSeek probe failed: %s", _probe_error(model_name, test_response))
+    finally:
+        # Stop the probes that are no longer needed (their breakers are left unchanged)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    logger.warning("DeepSeek probe: all models failed: %r", attempts)
+    result["deepseek_status"] = "error"
+    if last_error:
+        result["deepseek_message"] = f"All DeepSeek models failed. Last error: {last_error}. Check backend logs for details."
+    else:
+        result["deepseek_message"] = "DeepSeek test failed. Check backend logs for details."
+    return result
+
+
+def _is_usable_response(test_response: Any) -> bool:
+    """Returns True if a probe call succeeded with a non-empty message."""
+    if isinstance(test_response, Exception) or not getattr(test_response, "choices", None):
+        return False
+    content = getattr(test_response.choices[0].message, "content", None)
+    return bool(content and content.strip())
+
+
+def _probe_error(model_name: str, test_response: Any) -> str:
+    """Describes why a probe call was not usable (for logs and the status message)."""
+    if isinstance(test_response, Exception):
+        return f"Model {model_name}: {test_response}"
+    if not getattr(test_response, "choices", None):
+        return f"Model {model_name} returned no choices"
+    return f"Model {model_name} returned empty response"
+
+
+def _record_breaker_result(model_name: str, success: bool) -> None:
+    """
+    Updates a DeepSeek model's circuit breaker after a probe call.
+
+    Success closes the breaker; BREAKER_FAILURE_THRESHOLD consecutive failures
+    open it for BREAKER_OPEN_SECONDS.
+    """
+    if success:
+        _model_breakers.pop(model_name, None)
+        return
+    breaker = _model_breakers.setdefault(model_name, {"fails": 0, "open_until": 0.0})
+    breaker["fails"] += 1
+    if breaker["fails"] >= BREAKER_FAILURE_THRESHOLD:
+        breaker["open_until"] = time.monotonic() + BREAKER_OPEN_SECONDS
+
+
+async def get_cached_provider_status(
+    provider: str,
+    probe: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Tuple[Dict[str, Any], float]:
+    """
+    Returns a provider's probe result, reusing a recent one when available.
+
+    Inputs:
+        provider: "openai" or "deepseek" (cache key and result field prefix).
+        probe: The probe function to run when no fresh result is cached.
+
+    What happens:
+        Takes the provider's lock, so concurrent callers wait for one probe
+        instead of each starting their own.
+        Returns the cached result if it has not expired yet.
+        Otherwise runs the probe, timing it with time.perf_counter(), and caches it
+        for STATUS_TTL_WORKING seconds on success or STATUS_TTL_ERROR seconds on failure.
+
+    Output:
+        Returns a tuple of (copy of the probe result dictionary, probe latency in milliseconds).
+        The latency is that of the probe run that produced the cached result.
+
+    Context:
+        Keeps /ai/status and /health/ready cheap when they are polled.
+    """
+    async with _status_locks[provider]:
+        cached = _status_cache.get(provider)
+        if cached is not None and time.monotonic() < cached[0]:
+            return dict(cached[1]), cached[2]
+
+        started = time.perf_counter()
+        result = await probe()
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        ttl = STATUS_TTL_WORKING if result[f"{provider}_test_successful"] else STATUS_TTL_ERROR
+        _status_cache[provider] = (time.monotonic() + ttl, result, latency_ms)
+        return dict(result), latency_ms
+
+
+async def get_ai_status() -> Dict[str, Any]:
+    """
+    Builds the full AI provider status report.
+
+    Inputs:
+        None (checks global AI client configuration).
+
+    What happens:
+        Returns a copy of UNCONFIGURED_STATUS right away when no provider is configured.
+        Otherwise starts from "not configured" defaults for both providers.
+        Runs the (cached) probes of all configured providers concurrently.
+        Merges each probe result into the report.
+
+    Output:
+        Returns a dictionary with configuration flags, active provider, and per-provider
+        status, message, and test_successful fields.
+
+    Context:
+        Called by the /ai/status endpoint.
+    """
+    if openai_client is None and deepseek_client is None:
+        return UNCONFIGURED_STATUS.copy()
+
+    status = {
+        "openai_configured": openai_client is not None,
+        "deepseek_configured": deepseek_client is not None,
+        "active_provider": ai_provider,
+        "openai_status": "not_configured",
+        "openai_message": "",
+        "openai_test_successful": False,
+        "deepseek_status": "not_configured",
+        "deepseek_message": "",
+        "deepseek_test_successful": False,
+    }
+
+    probes = []
+
+    # Test OpenAI if configured
+    if openai_client:
+        probes.append(get_cached_provider_status("openai", probe_openai))
+    else:
+        status["openai_message"] = "Not configured (set OPENAI_API_KEY)"
+
+    # Test DeepSeek if configured
+    if deepseek_client:
+        probes.append(get_cached_provider_status("deepseek", probe_deepseek))
+    else:
+        status["deepseek_message"] = "Not configured (set OPENROUTER_API_KEY)"
+
+    for result, _ in await asyncio.gather(*probes):
+        status.update(result)
+
+    return status
+
+
+async def get_readiness() -> Dict[str, Any]:
+    """
+    Builds the readiness report used by the /health/ready endpoint.
+
+    Inputs:
+        None (checks global AI client configuration).
+
+    What happens:
+        Runs the (cached) probes of all configured providers concurrently.
+        Records one check per configured provider with its status and probe latency.
+        The backend counts as ready when at least one configured provider works.
+        With no provider configured the backend runs on fallback negotiation logic
+        by design, so it is reported ready with an empty check list.
+
+    Output:
+        Returns a dictionary like:
+        {"status": "ok", "checks": [{"name": "openai", "status": "ok", "latency_ms": 42.0}]}
+        where status is "ok" or "unavailable" (and each check is "ok" or "error").
+
+    Context:
+        Readiness (can we serve AI negotiation?) is kept separate from liveness
+        (/health), so a provider outage never makes the process look dead.
+    """
+    names = []
+    probes = []
+    if openai_client:
+        names.append("openai")
+        probes.append(get_cached_provider_status("openai", probe_openai))
+    if deepseek_client:
+        names.append("deepseek")
+        probes.append(get_cached_provider_status("deepseek", probe_deepseek))
+
+    checks = [
+        {
+            "name": name,
+            "status": "ok" if result[f"{name}_test_successful"] else "error",
+            "latency_ms": latency_ms,
+        }
+        for name, (result, latency_ms) in zip(names, await asyncio.gather(*probes))
+    ]
+
+    ready = not checks or any(check["status"] == "ok" for check in checks)
+    return {"status": "ok" if ready else "unavailable", "checks": checks}
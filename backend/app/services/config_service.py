@@ -3,12 +3,13 @@ Configuration service for loading and managing negotiation configuration.
 """
 
 from pathlib import Path
-import json
 
 from app.schemas import NegotiationConfigData
 
 DEFAULT_NEGOTIATION_CONFIG_PATH = Path("config/negotiation_config.json")
 DEFAULT_NEGOTIATION_CONFIG: NegotiationConfigData | None = None
+# st_mtime_ns of the config file when DEFAULT_NEGOTIATION_CONFIG was loaded (None if file missing)
+DEFAULT_NEGOTIATION_CONFIG_MTIME_NS: int | None = None
 
 
 def load_negotiation_config() -> NegotiationConfigData:
@@ -19,9 +20,10 @@ def load_negotiation_config() -> NegotiationConfigData:
         None (reads from global config file path).
     
     What happens:
-        Checks if config is already loaded in memory (returns cached version if so).
-        If not cached, tries to read from negotiation_config.json file.
-        Parses JSON and creates NegotiationConfigData object.
+        Checks the config file's modification time.
+        If config is already loaded in memory and the file hasn't changed since, returns the cached version.
+        Otherwise, tries to read from negotiation_config.json file.
+        Parses and validates the JSON bytes directly into a NegotiationConfigData object.
         Caches the loaded config in global variable.
         If file doesn't exist or has errors, returns default values.
     
@@ -40,17 +42,26 @@ def load_negotiation_config() -> NegotiationConfigData:
         Used by negotiation endpoints to validate proposals.
         Used by config endpoints to return current settings.
     """
-    global DEFAULT_NEGOTIATION_CONFIG
+    global DEFAULT_NEGOTIATION_CONFIG, DEFAULT_NEGOTIATION_CONFIG_MTIME_NS
     
-    if DEFAULT_NEGOTIATION_CONFIG is not None:
+    try:
+        mtime_ns = DEFAULT_NEGOTIATION_CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    
+    # Only re-parse when the file changed (or appeared/disappeared) since the last load
+    if DEFAULT_NEGOTIATION_CONFIG is not None and mtime_ns == DEFAULT_NEGOTIATION_CONFIG_MTIME_NS:
         return DEFAULT_NEGOTIATION_CONFIG
     
-    if DEFAULT_NEGOTIATION_CONFIG_PATH.exists():
+    DEFAULT_NEGOTIATION_CONFIG_MTIME_NS = mtime_ns
+    
+    if mtime_ns is not None:
         try:
-            with DEFAULT_NEGOTIATION_CONFIG_PATH.open() as f:
-                data = json.load(f)
-                DEFAULT_NEGOTIATION_CONFIG = NegotiationConfigData(**data)
-                return DEFAULT_NEGOTIATION_CONFIG
+            # Parse and validate the raw bytes in one pydantic-core pass
+            DEFAULT_NEGOTIATION_CONFIG = NegotiationConfigData.model_validate_json(
+                DEFAULT_NEGOTIATION_CONFIG_PATH.read_bytes()
+            )
+            return DEFAULT_NEGOTIATION_CONFIG
         except Exception as e:
             print(f"Error loading negotiation config: {e}")
     
@@ -71,6 +82,32 @@ def load_negotiation_config() -> NegotiationConfigData:
     return default_config
 
 
+def remember_negotiation_config(config: NegotiationConfigData) -> None:
+    """
+    Makes a just-saved negotiation config the cached one without reading it back.
+    
+    Inputs:
+        config: The validated config that was just written to DEFAULT_NEGOTIATION_CONFIG_PATH.
+    
+    What happens:
+        Stores the config in memory together with the file's new modification time.
+    
+    Output:
+        None (modifies global state).
+    
+    Context:
+        Called by the config update endpoint right after writing the file, so saving
+        does not re-read and re-parse the JSON it just produced. Later out-of-band
+        edits still change the mtime and are picked up by load_negotiation_config().
+    """
+    global DEFAULT_NEGOTIATION_CONFIG, DEFAULT_NEGOTIATION_CONFIG_MTIME_NS
+    try:
+        DEFAULT_NEGOTIATION_CONFIG_MTIME_NS = DEFAULT_NEGOTIATION_CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        DEFAULT_NEGOTIATION_CONFIG_MTIME_NS = None
+    DEFAULT_NEGOTIATION_CONFIG = config
+
+
 def reload_negotiation_config():
     """
     Forces reload of negotiation configuration from disk.
@@ -79,8 +116,8 @@ def reload_negotiation_config():
         None.
     
     What happens:
-        Clears the cached negotiation config from memory.
-        Forces the next load_negotiation_config() call to read from file again.
+        Clears the cached negotiation config (and its recorded file mtime) from memory.
+        Reads the config from file again.
     
     Output:
         None (modifies global state).
@@ -89,6 +126,7 @@ def reload_negotiation_config():
         Called after updating negotiation config to ensure changes are reflected.
         Used when instructor updates config and wants to see changes immediately.
     """
-    global DEFAULT_NEGOTIATION_CONFIG
+    global DEFAULT_NEGOTIATION_CONFIG, DEFAULT_NEGOTIATION_CONFIG_MTIME_NS
     DEFAULT_NEGOTIATION_CONFIG = None
+    DEFAULT_NEGOTIATION_CONFIG_MTIME_NS = None
     load_negotiation_config()
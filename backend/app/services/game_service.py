@@ -1,91 +1,136 @@
 """
-Game service functions for converting data structures and checking game state.
+Game service functions for converting data structures for API responses.
 """
 
-from simulation.core import GameState, Contract, RoundSummary, RoundOutput
+from dataclasses import fields
+from datetime import datetime
+
+from simulation.core import GameState, Contract, EconomicParams, RoundSummary, RoundOutput
 from app.schemas import (
     ContractData,
     GameStateResponse,
+    GameStateDeltaResponse,
+    RoundComponents,
     RoundOutputData,
     RoundSummaryData,
     ConfigStateResponse,
     EconomicParamsData,
     HistorySummary,
+    NegotiationHistory,
 )
 from simulation.core import get_current_params, get_current_history
-import statistics
+from math import sqrt
+from operator import mul
+
+# Contract and ContractData share field names, so conversion is a straight copy of these
+_CONTRACT_FIELDS = tuple(f.name for f in fields(Contract))
+# Same for the round dataclasses and their schemas (RoundOutput's fields are split
+# between RoundOutputData's totals and its nested RoundComponents)
+_ROUND_OUTPUT_FIELDS = tuple(name for name in RoundOutputData.model_fields if name != "components")
+_ROUND_COMPONENT_FIELDS = tuple(RoundComponents.model_fields)
+_ROUND_SUMMARY_FIELDS = tuple(f.name for f in fields(RoundSummary))
 
+# (history tuple, its summary): reload_defaults() swaps in a new tuple whenever the
+# demand history changes, so an identity check is enough to know the summary is current
+_history_summary_cache: tuple[tuple[int, ...], HistorySummary] | None = None
+# (params object, history tuple, response): reload_defaults() replaces both objects, so
+# the /config/current response is rebuilt only after the configuration changes
+_config_state_cache: tuple[EconomicParams, tuple[int, ...], ConfigStateResponse] | None = None
 
-def is_game_over(state: GameState) -> bool:
+
+def to_contract_data(contract: Contract) -> ContractData:
     """
-    Checks if the game has ended.
+    Converts a Contract object to ContractData schema for API responses.
     
     Inputs:
-        state: The current game state containing round number, total rounds, and early end flag.
+        contract: A Contract object from the simulation core containing all contract terms.
     
     What happens:
-        Compares the current round number to the total allowed rounds.
-        Also checks if the instructor ended the game early.
+        Copies every Contract field (prices, caps, length, type, etc.) by name.
+        Creates a ContractData object with model_construct (the values come from
+        our own Contract, so validation is skipped).
     
     Output:
-        Returns True if the game is over (round number exceeds total rounds OR game was ended early),
-        False otherwise.
+        Returns a ContractData object that can be serialized to JSON for API responses.
     
     Context:
-        Used throughout the application to determine if game actions are still allowed.
-        Called before allowing orders, negotiations, and other game actions.
+        Used whenever contract information needs to be sent to the frontend.
+        Called in API endpoints that return contract data (game state, negotiation responses, etc.).
     """
-    return state.round_number > state.total_rounds or state.ended_early
+    return ContractData.model_construct(
+        **{name: getattr(contract, name) for name in _CONTRACT_FIELDS}
+    )
 
 
-def has_active_contract(state: GameState) -> bool:
+def to_historical_demands_data(state: GameState) -> list[int]:
     """
-    Checks if there is an active contract in the game.
+    Returns the game's demand history as a list for API responses.
     
     Inputs:
-        state: The current game state containing the contract information.
+        state: The current game state.
     
     What happens:
-        Checks if the contract has any remaining rounds left.
+        Passes state.historical_demands through when it is already the session's own list.
+        Copies it into a list only while it is still the shared default-history tuple
+        (before the first round).
     
     Output:
-        Returns True if the contract has remaining_rounds > 0, False otherwise.
+        Returns a list of demand values for the List[int] historical_demands schema fields.
     
     Context:
-        Used to determine if the student can place orders or needs to negotiate a new contract.
-        Called before allowing order placement and when checking negotiation eligibility.
+        Used by the state, delta and summary responses. pydantic serializes a List[int]
+        field much faster than a Sequence[int] one, so the field stays a list and only
+        the tuple case pays for a copy.
     """
-    return state.contract.remaining_rounds > 0
+    history = state.historical_demands
+    return history if isinstance(history, list) else list(history)
 
 
-def to_contract_data(contract: Contract) -> ContractData:
+def save_ongoing_negotiation(state: GameState) -> None:
     """
-    Converts a Contract object to ContractData schema for API responses.
+    Saves the in-progress negotiation (if any) to the game's negotiation history.
     
     Inputs:
-        contract: A Contract object from the simulation core containing all contract terms.
+        state: The current game state with negotiation chat history and draft contract.
     
     What happens:
-        Extracts all contract fields (prices, caps, length, type, etc.) from the Contract object.
-        Creates a new ContractData object with the same values.
+        Does nothing if there is no chat history and no draft contract.
+        Skips saving if the last history entry is the same negotiation
+        (same start time and same number of chat messages), to avoid duplicates.
+        Otherwise appends a record marked "ongoing" (draft contract exists) or "rejected",
+        with the current time as end time.
     
     Output:
-        Returns a ContractData object that can be serialized to JSON for API responses.
+        None (appends to state.negotiation_history).
     
     Context:
-        Used whenever contract information needs to be sent to the frontend.
-        Called in API endpoints that return contract data (game state, negotiation responses, etc.).
+        Called when the game ends - by end_game_early and by get_game_summary
+        (for games that ended naturally) - so unfinished negotiations still appear in the summary.
     """
-    return ContractData(
-        wholesale_price=contract.wholesale_price,
-        buyback_price=contract.buyback_price,
-        cap_type=contract.cap_type,
-        cap_value=contract.cap_value,
-        length=contract.length,
-        remaining_rounds=contract.remaining_rounds,
-        contract_type=contract.contract_type,
-        revenue_share=contract.revenue_share,
-    )
+    if not (state.negotiation_chat_history or state.negotiation_draft_contract):
+        return
+    
+    current_start_time = state.negotiation_start_time
+    
+    # Check if the last negotiation in history matches the current one (to avoid duplicates)
+    # Start times identify a negotiation and its chat only grows by appending,
+    # so matching start time + message count means it is the same negotiation
+    if state.negotiation_history and current_start_time:
+        last_neg = state.negotiation_history[-1]
+        if (last_neg.start_time == current_start_time and
+            len(last_neg.chat_messages) == len(state.negotiation_chat_history)):
+            return
+    
+    # Built from trusted state - model_construct skips validation
+    draft = state.negotiation_draft_contract
+    state.negotiation_history.append(NegotiationHistory.model_construct(
+        # No copy: the game is over, so this chat list can no longer grow
+        chat_messages=state.negotiation_chat_history,
+        final_decision="ongoing" if draft else "rejected",
+        final_contract=to_contract_data(draft) if draft else None,
+        start_time=current_start_time,
+        end_time=datetime.now().isoformat(),  # Mark end time when game ends
+    ))
 
 
 def to_game_state_response(session_id: str, state: GameState) -> GameStateResponse:
@@ -99,77 +144,131 @@ def to_game_state_response(session_id: str, state: GameState) -> GameStateRespon
     What happens:
         Extracts all relevant game state information (rounds, profits, contract, etc.).
         Converts the contract to ContractData format.
-        Converts all round summaries to RoundSummaryData format.
+        Reuses the RoundSummaryData of every completed round (see get_round_summaries_data).
         Checks if the game is over.
         Converts historical demands list to a regular list.
     
     Output:
         Returns a GameStateResponse object containing all game state information in API-ready format.
+        Built with model_construct: every value comes from our own GameState, so
+        field validation would only repeat work.
     
     Context:
         Used in all API endpoints that return game state to the frontend.
         Called after game actions (start game, place order, negotiate) to return updated state.
     """
-    return GameStateResponse(
+    return GameStateResponse.model_construct(
+        session_id=session_id,
+        round_number=state.round_number,
+        total_rounds=state.total_rounds,
+        contract=to_contract_data(state.contract),
+        cumulative_buyer_profit=state.cumulative_buyer_profit,
+        cumulative_supplier_profit=state.cumulative_supplier_profit,
+        game_over=state.game_over,
+        demand_method=state.method,
+        historical_demands=to_historical_demands_data(state),
+        rounds=get_round_summaries_data(state),
+    )
+
+
+def to_game_state_delta_response(session_id: str, state: GameState) -> GameStateDeltaResponse:
+    """
+    Converts a GameState object to the GameStateDeltaResponse sent after game actions.
+    
+    Inputs:
+        session_id: The unique identifier for this game session.
+        state: The current GameState object containing all game information.
+    
+    What happens:
+        Same as to_game_state_response(), but only the most recent round summary is
+        converted (plus the number of completed rounds) instead of all of them.
+    
+    Output:
+        Returns a GameStateDeltaResponse object (built with model_construct, like
+        to_game_state_response()).
+    
+    Context:
+        Used by /game/order, /game/negotiate and /game/negotiate/accept-counter,
+        so their responses stay the same size as the game goes on.
+    """
+    return GameStateDeltaResponse.model_construct(
         session_id=session_id,
         round_number=state.round_number,
         total_rounds=state.total_rounds,
         contract=to_contract_data(state.contract),
         cumulative_buyer_profit=state.cumulative_buyer_profit,
         cumulative_supplier_profit=state.cumulative_supplier_profit,
-        game_over=is_game_over(state),
+        game_over=state.game_over,
         demand_method=state.method,
-        historical_demands=list(state.historical_demands),
-        rounds=[to_round_summary_data(rs) for rs in state.round_summaries],
+        historical_demands=to_historical_demands_data(state),
+        last_round=get_round_summaries_data(state)[-1] if state.round_summaries else None,
+        rounds_count=len(state.round_summaries),
     )
 
 
-def to_round_output_data(round_output: RoundOutput) -> RoundOutputData:
+def to_round_output_data(
+    round_output: RoundOutput,
+    include_components: bool = False,
+) -> RoundOutputData:
     """
     Converts a RoundOutput object to RoundOutputData schema for API responses.
     
     Inputs:
         round_output: A RoundOutput object from the simulation containing all round results.
+        include_components: Whether to attach the detailed revenue/cost breakdown.
     
     What happens:
-        Extracts all round output fields (quantities, revenues, costs, profits) from the RoundOutput object.
-        Creates a new RoundOutputData object with all the same values.
+        Copies the quantity and total revenue/cost/profit fields by name
+        (RoundOutputData declares the same names as RoundOutput).
+        If include_components is set, also copies the twelve buyer/supplier
+        components into a nested RoundComponents; otherwise components stays None.
     
     Output:
-        Returns a RoundOutputData object containing all round results in API-ready format.
+        Returns a RoundOutputData object containing the round results in API-ready format.
     
     Context:
         Used when returning round results after placing an order.
         Called in the place_order endpoint to format the simulation results for the frontend.
     """
-    return RoundOutputData(
-        order_quantity=round_output.order_quantity,
-        realized_demand=round_output.realized_demand,
-        sales=round_output.sales,
-        unsold=round_output.unsold,
-        returns=round_output.returns,
-        leftovers=round_output.leftovers,
-        buyer_revenue=round_output.buyer_revenue,
-        buyer_cost=round_output.buyer_cost,
-        buyer_profit=round_output.buyer_profit,
-        supplier_revenue=round_output.supplier_revenue,
-        supplier_cost=round_output.supplier_cost,
-        supplier_profit=round_output.supplier_profit,
-        retail_revenue=round_output.retail_revenue,
-        salvage_revenue_buyer=round_output.salvage_revenue_buyer,
-        buyback_refund_buyer=round_output.buyback_refund_buyer,
-        wholesale_cost_buyer=round_output.wholesale_cost_buyer,
-        return_shipping_cost_buyer=round_output.return_shipping_cost_buyer,
-        revenue_share_payment_buyer=round_output.revenue_share_payment_buyer,
-        wholesale_revenue_supplier=round_output.wholesale_revenue_supplier,
-        salvage_revenue_supplier=round_output.salvage_revenue_supplier,
-        production_cost_supplier=round_output.production_cost_supplier,
-        buyback_cost_supplier=round_output.buyback_cost_supplier,
-        return_handling_cost_supplier=round_output.return_handling_cost_supplier,
-        revenue_share_revenue_supplier=round_output.revenue_share_revenue_supplier,
+    components = None
+    if include_components:
+        components = RoundComponents.model_construct(
+            **{name: getattr(round_output, name) for name in _ROUND_COMPONENT_FIELDS}
+        )
+    # Values were computed by the simulation, so model_construct skips validation
+    return RoundOutputData.model_construct(
+        **{name: getattr(round_output, name) for name in _ROUND_OUTPUT_FIELDS},
+        components=components,
     )
 
 
+def get_round_summaries_data(state: GameState) -> list[RoundSummaryData]:
+    """
+    Returns RoundSummaryData for every completed round of a game.
+    
+    Inputs:
+        state: The game state whose round_summaries should be converted.
+    
+    What happens:
+        Converts only the rounds added since the last call and appends them to
+        state.round_summary_data; earlier rounds are reused as they are.
+    
+    Output:
+        Returns state.round_summary_data (one entry per round summary). The entries
+        are frozen, so the same objects can go into every response.
+    
+    Context:
+        Used by to_game_state_response(), to_game_state_delta_response() and the
+        game summary, so a GET of the state no longer re-converts every past round.
+    """
+    converted = state.round_summary_data
+    if len(converted) < len(state.round_summaries):
+        converted.extend(
+            to_round_summary_data(rs) for rs in state.round_summaries[len(converted):]
+        )
+    return converted
+
+
 def to_round_summary_data(rs: RoundSummary) -> RoundSummaryData:
     """
     Converts a RoundSummary object to RoundSummaryData schema for API responses.
@@ -178,8 +277,8 @@ def to_round_summary_data(rs: RoundSummary) -> RoundSummaryData:
         rs: A RoundSummary object containing all information about a completed round.
     
     What happens:
-        Extracts all round summary fields including round index, quantities, profits, and contract details.
-        Creates a new RoundSummaryData object with all the same values.
+        Copies every RoundSummary field (round index, quantities, profits, contract details)
+        by name; RoundSummaryData declares the same fields.
     
     Output:
         Returns a RoundSummaryData object containing round summary information in API-ready format.
@@ -188,28 +287,70 @@ def to_round_summary_data(rs: RoundSummary) -> RoundSummaryData:
         Used when building game state responses and game summaries.
         Called when converting lists of round summaries for display in the frontend.
     """
-    return RoundSummaryData(
-        round_index=rs.round_index,
-        order_quantity=rs.order_quantity,
-        realized_demand=rs.realized_demand,
-        buyer_revenue=rs.buyer_revenue,
-        buyer_cost=rs.buyer_cost,
-        buyer_profit=rs.buyer_profit,
-        supplier_revenue=rs.supplier_revenue,
-        supplier_cost=rs.supplier_cost,
-        supplier_profit=rs.supplier_profit,
-        # Contract details for logging
-        wholesale_price=rs.wholesale_price,
-        buyback_price=rs.buyback_price,
-        cap_type=rs.cap_type,
-        cap_value=rs.cap_value,
-        contract_length=rs.contract_length,
-        remaining_rounds=rs.remaining_rounds,
-        contract_type=rs.contract_type,
-        revenue_share=rs.revenue_share,
+    # Values were computed by the simulation, so model_construct skips validation
+    return RoundSummaryData.model_construct(
+        **{name: getattr(rs, name) for name in _ROUND_SUMMARY_FIELDS}
     )
 
 
+def get_history_summary() -> HistorySummary:
+    """
+    Returns the statistical summary of the current demand history.
+    
+    Inputs:
+        None (reads the current demand history).
+    
+    What happens:
+        Returns the cached summary if it was computed for the current history tuple.
+        Otherwise calculates demand statistics (min, max, mean, standard deviation)
+        from one sum and one sum of squares, takes a sample of the first values,
+        and caches the result.
+    
+    Output:
+        Returns a HistorySummary object.
+    
+    Context:
+        Used by build_config_state_response() and by the negotiation chat prompt
+        (ai_service._prepare_chat_call()). The history only changes through
+        /config/update (which reloads it as a new tuple), so most /config/current
+        calls skip the passes over the history entirely.
+    """
+    global _history_summary_cache
+    
+    history = get_current_history()
+    if _history_summary_cache is not None and _history_summary_cache[0] is history:
+        return _history_summary_cache[1]
+
+    count = len(history)
+    if count > 0:
+        h_min = min(history)
+        h_max = max(history)
+        # Sum and sum of squares in two C-level passes; demands are ints, so both are
+        # exact and the variance has no floating-point cancellation
+        total = sum(history)
+        total_sq = sum(map(mul, history, history))
+        h_mean = total / count
+        h_stdev = sqrt((count * total_sq - total * total) / (count * (count - 1))) if count > 1 else None
+    else:
+        h_min = h_max = 0
+        h_mean = 0.0
+        h_stdev = None
+
+    # Take first few values as a sample
+    sample = history[:10]
+
+    hist_summary = HistorySummary(
+        count=count,
+        min=h_min,
+        max=h_max,
+        mean=h_mean,
+        stdev=h_stdev,
+        sample=sample,
+    )
+    _history_summary_cache = (history, hist_summary)
+    return hist_summary
+
+
 def build_config_state_response() -> ConfigStateResponse:
     """
     Builds a response containing all current configuration state.
@@ -218,10 +359,10 @@ def build_config_state_response() -> ConfigStateResponse:
         None (reads from global configuration).
     
     What happens:
+        Returns the cached response if the parameters and history are unchanged.
         Gets current economic parameters from config.
-        Gets current demand history.
-        Calculates demand statistics (min, max, mean, standard deviation).
-        Loads negotiation configuration.
+        Gets the demand history summary (min, max, mean, standard deviation),
+        cached by get_history_summary().
         Creates response objects with all this information.
     
     Output:
@@ -234,23 +375,19 @@ def build_config_state_response() -> ConfigStateResponse:
         Used by the /config endpoint to return current configuration.
         Called when instructor wants to view current settings.
         Provides all configuration data needed by the frontend.
+        The (frozen) response is reused until reload_defaults() swaps in new
+        parameters or history, so polling /config/current builds nothing.
     """
+    global _config_state_cache
+    
     params = get_current_params()
     history = get_current_history()
-
-    count = len(history)
-    if count > 0:
-        h_min = min(history)
-        h_max = max(history)
-        h_mean = statistics.mean(history)
-        h_stdev = statistics.stdev(history) if count > 1 else None
-    else:
-        h_min = h_max = 0
-        h_mean = 0.0
-        h_stdev = None
-
-    # Take first few values as a sample
-    sample = history[:10]
+    if (
+        _config_state_cache is not None
+        and _config_state_cache[0] is params
+        and _config_state_cache[1] is history
+    ):
+        return _config_state_cache[2]
 
     econ_data = EconomicParamsData(
         retail_price=params.retail_price,
@@ -261,17 +398,10 @@ def build_config_state_response() -> ConfigStateResponse:
         return_handling_supplier=params.return_handling_supplier,
     )
 
-    hist_summary = HistorySummary(
-        count=count,
-        min=h_min,
-        max=h_max,
-        mean=h_mean,
-        stdev=h_stdev,
-        sample=sample,
-    )
-
-    return ConfigStateResponse(
+    response = ConfigStateResponse(
         economic_params=econ_data,
-        history_summary=hist_summary,
+        history_summary=get_history_summary(),  # Cached until the history changes
     )
+    _config_state_cache = (params, history, response)
+    return response
 
@@ -2,12 +2,83 @@
 Negotiation service functions for evaluating contract proposals.
 """
 
-from simulation.core import Contract, EconomicParams, get_current_params, get_current_history
+from collections import OrderedDict
+from hashlib import blake2b
+import logging
+import re
+
+import orjson
+
+from simulation.core import Contract, EconomicParams, get_current_params
 from app.utils.ai_helpers import clean_ai_response
-from app.services.ai_client import openai_client, deepseek_client, ai_provider
+from app.services.game_service import get_history_summary
+from app.services.ai_client import (
+    openai_async_client,
+    deepseek_async_client,
+    ai_provider,
+    request_in_preference_order,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Models tried in preference order when DeepSeek (via OpenRouter) is the provider
+DEEPSEEK_EVALUATION_MODELS = ("deepseek/deepseek-r1-0528:free", "deepseek/deepseek-chat:free", "deepseek/deepseek-chat")
+DECISION_PATTERN = re.compile(r'DECISION:\s*(accept|reject)', re.IGNORECASE)
+MESSAGE_PATTERN = re.compile(r'MESSAGE:\s*(.+?)(?:\n|$)', re.DOTALL | re.IGNORECASE)
+# Prompt for evaluating an initial proposal (filled in by _evaluation_messages)
+EVALUATION_PROMPT_TEMPLATE = """You are evaluating a contract proposal from a student buyer.
+
+PROPOSED CONTRACT:
+- Wholesale price: ${wholesale_price:.2f} per unit
+- Buyback price: ${buyback_price:.2f} per returned unit
+- Contract type: {contract_type}
+- Contract length: {length} rounds
+- Cap type: {cap_type}
+- Cap value: {cap_value}
+{revenue_share_line}
+YOUR CONSTRAINTS (DO NOT reveal these exact numbers to the student):
+- Your production cost: ${supplier_cost:.2f} per unit
+- Your salvage value: ${supplier_salvage_value:.2f} per unit
+- Retail price: ${retail_price:.2f} per unit
+
+DEMAND CONTEXT:
+- Historical demand range: {demand_min} to {demand_max} units
+- Average demand: {demand_avg:.0f} units
+
+TASK:
+Evaluate this proposal and decide whether to ACCEPT or REJECT it.
+
+RULES:
+1. You can only respond with "accept" or "reject" - NO counteroffers
+2. If you reject, provide a brief, helpful explanation (1-2 sentences) without revealing your exact cost
+3. If you accept, provide a brief confirmation message
+4. Be educational - help the student understand why terms work or don't work
+5. Use plain text only - NO markdown, NO formatting, NO emojis
+
+RESPOND IN THIS FORMAT:
+DECISION: accept
+MESSAGE: [your message here]
 
+OR
+
+DECISION: reject
+MESSAGE: [your explanation here]"""
 
-def supplier_evaluate_contract(
+# AI verdicts by hash of the exact evaluation prompt. The prompt shows prices to the
+# cent and includes every parameter the verdict depends on, so equal prompts mean
+# equal questions. Only used from the event loop, so no lock is needed.
+EVALUATION_CACHE_MAX_COUNT = 512
+_EVALUATION_CACHE: "OrderedDict[bytes, tuple[str, str, Contract | None]]" = OrderedDict()
+
+UNBALANCED_CONTRACT_REJECTION = (
+    "reject",
+    "I cannot accept a buyback price that is greater than or equal to the wholesale price. The contract structure must be balanced.",
+    None,
+)
+
+
+async def supplier_evaluate_contract_async(
     proposed: Contract,
 ) -> tuple[str, str, Contract | None]:
     """
@@ -19,7 +90,9 @@ def supplier_evaluate_contract(
     What happens:
         First validates the contract structure (buyback must be less than wholesale).
         If invalid, immediately rejects with an explanation.
-        Otherwise, uses AI to evaluate the proposal based on economic parameters and demand history.
+        Buyback proposals priced at or below the supplier's cost are rejected by
+        evaluate_proposal_simple_logic without calling the AI.
+        Otherwise, awaits the AI evaluation (evaluate_proposal_with_ai_async).
         The AI can only accept or reject - no counteroffers on initial proposals.
         Counteroffers only come after conversation in the chat.
     
@@ -30,26 +103,175 @@ def supplier_evaluate_contract(
         - counter_contract: Always None (counters come from chat)
     
     Context:
-        Called when student submits an initial contract proposal.
-        Part of the educational negotiation system that teaches contract terms and negotiation.
-        Counteroffers are intentionally not provided here - they emerge from chat discussions.
+        Called when student submits an initial contract proposal (/game/negotiate).
+        While the AI evaluates, the event loop keeps serving other requests, so many
+        negotiations can be in flight without each one holding a threadpool worker.
     """
     params = get_current_params()
     
     # Basic validation - reject invalid contracts immediately
     if proposed.buyback_price >= proposed.wholesale_price:
-        return (
-            "reject",
-            "I cannot accept a buyback price that is greater than or equal to the wholesale price. The contract structure must be balanced.",
-            None,
-        )
+        return UNBALANCED_CONTRACT_REJECTION
+    
+    # Proposals that lose money on every unit don't need the AI to be rejected
+    if is_below_cost_proposal(proposed, params):
+        return evaluate_proposal_simple_logic(proposed, params)
     
     # Use AI to evaluate the proposal
     # This provides more nuanced evaluation and educational feedback
-    return evaluate_proposal_with_ai(proposed, params)
+    return await evaluate_proposal_with_ai_async(proposed, params)
+
+
+def is_below_cost_proposal(proposed: Contract, params: EconomicParams) -> bool:
+    """
+    Checks whether a proposal is certain to lose the supplier money on every unit.
+    
+    Inputs:
+        proposed: A Contract object with the student's proposed terms.
+        params: EconomicParams object (for the supplier's production cost).
+    
+    Output:
+        Returns True for buyback contracts whose wholesale price does not exceed the
+        supplier's production cost; False otherwise.
+    
+    Context:
+        Lets supplier_evaluate_contract_async reject such proposals without an AI
+        round-trip (evaluate_proposal_simple_logic rejects them too). Revenue sharing
+        and hybrid contracts always go to the AI, since the supplier's revenue share
+        can make a low wholesale price worthwhile.
+    """
+    return proposed.contract_type == "buyback" and proposed.wholesale_price <= params.supplier_cost
 
 
-def evaluate_proposal_with_ai(
+def _evaluation_messages(
+    proposed: Contract,
+    params: EconomicParams,
+) -> list[dict]:
+    """
+    Builds the chat messages sent to the AI to evaluate a proposal.
+    
+    Inputs:
+        proposed: A Contract object with the student's proposed terms.
+        params: EconomicParams object containing supplier costs, salvage values, retail price.
+    
+    What happens:
+        Takes the cached demand statistics for context.
+        Fills EVALUATION_PROMPT_TEMPLATE with the proposal, supplier constraints, and demand context.
+    
+    Output:
+        Returns the [system, user] message list for chat.completions.create.
+    
+    Context:
+        Called by evaluate_proposal_with_ai_async (the prompt is also the verdict cache key).
+    """
+    # Demand statistics are computed once per loaded history (see get_history_summary)
+    demand_stats = get_history_summary()
+    
+    # Revenue share only matters for revenue_sharing and hybrid contracts
+    revenue_share_line = ""
+    if proposed.contract_type in ("revenue_sharing", "hybrid"):
+        revenue_share_line = f"- Revenue share: {proposed.revenue_share:.2%}\n"
+    
+    evaluation_prompt = EVALUATION_PROMPT_TEMPLATE.format_map({
+        "wholesale_price": proposed.wholesale_price,
+        "buyback_price": proposed.buyback_price,
+        "contract_type": proposed.contract_type,
+        "length": proposed.length,
+        "cap_type": proposed.cap_type,
+        "cap_value": proposed.cap_value,
+        "revenue_share_line": revenue_share_line,
+        "supplier_cost": params.supplier_cost,
+        "supplier_salvage_value": params.supplier_salvage_value,
+        "retail_price": params.retail_price,
+        "demand_min": demand_stats.min,
+        "demand_max": demand_stats.max,
+        "demand_avg": demand_stats.mean,
+    })
+
+    return [
+        {"role": "system", "content": "You are a supplier evaluating contract proposals. Be educational and helpful."},
+        {"role": "user", "content": evaluation_prompt}
+    ]
+
+
+def _evaluation_cache_key(messages: list[dict]) -> bytes:
+    """Hashes the evaluation messages into the verdict cache key (16-byte BLAKE2b digest)."""
+    return blake2b(orjson.dumps(messages), digest_size=16).digest()
+
+
+def _cached_evaluation(cache_key: bytes) -> tuple[str, str, Contract | None] | None:
+    """Returns the remembered verdict for cache_key, or None on a miss."""
+    result = _EVALUATION_CACHE.get(cache_key)
+    if result is not None:
+        _EVALUATION_CACHE.move_to_end(cache_key)
+    return result
+
+
+def _remember_evaluation(cache_key: bytes, result: tuple[str, str, Contract | None]) -> None:
+    """
+    Stores a verdict the AI gave, dropping the least recently used one beyond
+    EVALUATION_CACHE_MAX_COUNT. Callers only store verdicts parsed from a model's
+    DECISION/MESSAGE reply, never the simple-logic fallback.
+    """
+    _EVALUATION_CACHE[cache_key] = result
+    _EVALUATION_CACHE.move_to_end(cache_key)
+    if len(_EVALUATION_CACHE) > EVALUATION_CACHE_MAX_COUNT:
+        _EVALUATION_CACHE.popitem(last=False)
+
+
+def _parse_evaluation(ai_response: str | None) -> tuple[str, str, Contract | None] | None:
+    """
+    Turns the AI's raw evaluation text into a (decision, message, counter) tuple.
+    
+    Inputs:
+        ai_response: The AI's reply text (None or empty if no model answered).
+    
+    What happens:
+        Extracts the DECISION and MESSAGE lines and cleans the message.
+    
+    Output:
+        Returns a tuple of (decision, message, counter_contract) with counter_contract None,
+        or None if the reply is missing or cannot be parsed.
+    
+    Context:
+        Called by evaluate_proposal_with_ai_async, which falls back to simple logic
+        (and caches nothing) when this returns None.
+    """
+    if not ai_response:
+        return None
+    
+    decision_match = DECISION_PATTERN.search(ai_response)
+    message_match = MESSAGE_PATTERN.search(ai_response)
+    
+    if decision_match and message_match:
+        decision = decision_match.group(1).lower()
+        message = message_match.group(1).strip()
+        # Clean the message
+        message = clean_ai_response(message)
+        return (decision, message, None)
+    else:
+        logger.warning("Failed to parse AI evaluation response: %s", ai_response[:200])
+        return None
+
+
+async def _request_evaluation(client, model: str, messages: list[dict]) -> str:
+    """
+    Sends one evaluation request and returns the reply text (raises ValueError if it is empty).
+    evaluate_proposal_with_ai_async runs one of these per DeepSeek model (through
+    request_in_preference_order).
+    """
+    response = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=150,
+        temperature=0.3,
+    )
+    if response.choices and response.choices[0].message.content:
+        return response.choices[0].message.content
+    raise ValueError(f"Model {model} returned empty response")
+
+
+async def evaluate_proposal_with_ai_async(
     proposed: Contract,
     params: EconomicParams,
 ) -> tuple[str, str, Contract | None]:
@@ -61,10 +283,12 @@ def evaluate_proposal_with_ai(
         params: EconomicParams object containing supplier costs, salvage values, retail price.
     
     What happens:
-        Gets demand history for context.
-        Builds a detailed prompt explaining the proposal, supplier constraints, and demand context.
-        Sends the prompt to the AI (OpenAI or DeepSeek).
-        The AI evaluates whether the proposal is acceptable based on costs and market conditions.
+        Builds the evaluation prompt (_evaluation_messages).
+        Returns the remembered verdict if the exact same prompt was evaluated before.
+        Awaits the AI on openai_async_client / deepseek_async_client.
+        With DeepSeek, the free DEEPSEEK_EVALUATION_MODELS are asked concurrently and
+        the most preferred non-empty answer wins (the other requests are cancelled);
+        the paid model is only asked if every free model fails.
         Parses the AI response to extract decision and explanation message.
         Falls back to simple logic if AI fails or is not configured.
     
@@ -75,115 +299,46 @@ def evaluate_proposal_with_ai(
         - counter_contract: Always None (counters come from chat, not initial proposals)
     
     Context:
-        Called by supplier_evaluate_contract to get AI-based evaluation.
-        Provides educational feedback to help students understand contract economics.
+        Called by supplier_evaluate_contract_async.
         Only returns accept/reject - counteroffers are intentionally excluded to encourage conversation.
     """
-    # Get demand history for context
-    history = get_current_history()
-    
-    # Build evaluation prompt with proposal details, supplier constraints, and demand context
-    evaluation_prompt = f"""You are evaluating a contract proposal from a student buyer.
-
-PROPOSED CONTRACT:
-- Wholesale price: ${proposed.wholesale_price:.2f} per unit
-- Buyback price: ${proposed.buyback_price:.2f} per returned unit
-- Contract type: {proposed.contract_type}
-- Contract length: {proposed.length} rounds
-- Cap type: {proposed.cap_type}
-- Cap value: {proposed.cap_value}
-"""
-    if proposed.contract_type in ("revenue_sharing", "hybrid"):
-        evaluation_prompt += f"- Revenue share: {proposed.revenue_share:.2%}\n"
+    messages = _evaluation_messages(proposed, params)
+    # Identical prompts (same terms, parameters and demand stats) reuse the earlier verdict
+    cache_key = _evaluation_cache_key(messages)
+    cached = _cached_evaluation(cache_key)
+    if cached is not None:
+        return cached
     
-    evaluation_prompt += f"""
-YOUR CONSTRAINTS (DO NOT reveal these exact numbers to the student):
-- Your production cost: ${params.supplier_cost:.2f} per unit
-- Your salvage value: ${params.supplier_salvage_value:.2f} per unit
-- Retail price: ${params.retail_price:.2f} per unit
-
-DEMAND CONTEXT:
-- Historical demand range: {min(history) if history else 0} to {max(history) if history else 0} units
-- Average demand: {sum(history)/len(history) if history else 0:.0f} units
-
-TASK:
-Evaluate this proposal and decide whether to ACCEPT or REJECT it.
-
-RULES:
-1. You can only respond with "accept" or "reject" - NO counteroffers
-2. If you reject, provide a brief, helpful explanation (1-2 sentences) without revealing your exact cost
-3. If you accept, provide a brief confirmation message
-4. Be educational - help the student understand why terms work or don't work
-5. Use plain text only - NO markdown, NO formatting, NO emojis
-
-RESPOND IN THIS FORMAT:
-DECISION: accept
-MESSAGE: [your message here]
-
-OR
-
-DECISION: reject
-MESSAGE: [your explanation here]"""
-
     try:
         # Use the same AI provider as chat
-        if ai_provider == "openai" and openai_client:
-            response = openai_client.chat.completions.create(
+        if ai_provider == "openai" and openai_async_client:
+            response = await openai_async_client.chat.completions.create(
                 model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a supplier evaluating contract proposals. Be educational and helpful."},
-                    {"role": "user", "content": evaluation_prompt}
-                ],
+                messages=messages,
                 max_tokens=150,
                 temperature=0.3,  # Lower temperature for more consistent evaluation
             )
             ai_response = response.choices[0].message.content
-        elif ai_provider == "deepseek" and deepseek_client:
-            models_to_try = ["deepseek/deepseek-r1-0528:free", "deepseek/deepseek-chat:free", "deepseek/deepseek-chat"]
-            ai_response = None
-            for try_model in models_to_try:
-                try:
-                    response = deepseek_client.chat.completions.create(
-                        model=try_model,
-                        messages=[
-                            {"role": "system", "content": "You are a supplier evaluating contract proposals. Be educational and helpful."},
-                            {"role": "user", "content": evaluation_prompt}
-                        ],
-                        max_tokens=150,
-                        temperature=0.3,
-                    )
-                    if response.choices and response.choices[0].message.content:
-                        ai_response = response.choices[0].message.content
-                        break
-                except Exception:
-                    if try_model == models_to_try[-1]:
-                        raise
-                    continue
+        elif ai_provider == "deepseek" and deepseek_async_client:
+            # The free models are asked at once and the preferred one that answers wins;
+            # the paid model is only asked if both fail (see request_in_preference_order)
+            ai_response = await request_in_preference_order(
+                lambda try_model: _request_evaluation(deepseek_async_client, try_model, messages),
+                DEEPSEEK_EVALUATION_MODELS,
+            )
         else:
             # Fallback to simple logic if AI not available
             return evaluate_proposal_simple_logic(proposed, params)
         
-        if not ai_response:
-            return evaluate_proposal_simple_logic(proposed, params)
-        
-        # Parse AI response
-        import re
-        decision_match = re.search(r'DECISION:\s*(accept|reject)', ai_response, re.IGNORECASE)
-        message_match = re.search(r'MESSAGE:\s*(.+?)(?:\n|$)', ai_response, re.DOTALL | re.IGNORECASE)
-        
-        if decision_match and message_match:
-            decision = decision_match.group(1).lower()
-            message = message_match.group(1).strip()
-            # Clean the message
-            message = clean_ai_response(message)
-            return (decision, message, None)
-        else:
-            # Fallback if parsing fails
-            print(f"Failed to parse AI evaluation response: {ai_response[:200]}")
+        result = _parse_evaluation(ai_response)
+        if result is None:
+            # No usable verdict - answer with simple logic, but don't remember it
             return evaluate_proposal_simple_logic(proposed, params)
+        _remember_evaluation(cache_key, result)
+        return result
             
     except Exception as e:
-        print(f"AI evaluation error: {e}")
+        logger.error("AI evaluation error: %s", e)
         # Fallback to simple logic
         return evaluate_proposal_simple_logic(proposed, params)
 
@@ -215,7 +370,7 @@ def evaluate_proposal_simple_logic(
     Context:
         Used as a fallback when AI evaluation fails or AI is not configured.
         Provides basic validation to ensure the game can continue even without AI.
-        Called by evaluate_proposal_with_ai when AI calls fail.
+        Called by evaluate_proposal_with_ai_async when AI calls fail.
     """
     min_wholesale = params.supplier_cost + 1.0
     acceptable_wholesale = min_wholesale + 4.0
@@ -2,9 +2,123 @@
 Shared game state storage.
 """
 
-from typing import Dict
+import asyncio
+from collections import OrderedDict
+from threading import Lock
+from typing import Iterator, MutableMapping, Tuple
+import time
+
 from simulation.core import GameState
 
+# Sessions idle for longer than this are dropped (seconds)
+SESSION_IDLE_TTL = 2 * 3600
+# Upper bound on stored sessions; the least recently used one is dropped beyond this
+SESSION_MAX_COUNT = 10_000
+# Number of per-session lock shards (power of two, so a bit mask picks the shard)
+SESSION_LOCK_SHARDS = 256
+
+
+class SessionStore(MutableMapping[str, GameState]):
+    """
+    Dictionary-like session storage that forgets abandoned games.
+
+    Inputs:
+        ttl: Seconds a session may stay unused before it expires.
+        maxsize: Maximum number of sessions kept at once.
+
+    What happens:
+        Keeps sessions in least-recently-used order (OrderedDict).
+        Every read or write refreshes the session's timestamp and moves it to the end.
+        Expired sessions are popped from the front on each write; if the store is
+        still full, the least recently used session is dropped.
+
+    Output:
+        Behaves like Dict[str, GameState]: SESSIONS[sid], SESSIONS.get(sid),
+        SESSIONS[sid] = state and `sid in SESSIONS` work as before. Expired
+        sessions raise KeyError / return None, so routes answer 404.
+
+    Context:
+        Replaces the old unbounded dict so a long-running server does not keep every
+        game ever started. A threading lock guards the reorders because start_game is a
+        sync route and stores new sessions from FastAPI's threadpool. The only AI work
+        left in the threadpool is the chat stream's sync iterator, which does not touch
+        the store.
+    """
+
+    def __init__(self, ttl: float = SESSION_IDLE_TTL, maxsize: int = SESSION_MAX_COUNT) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, GameState]]" = OrderedDict()
+        self._lock = Lock()
+
+    def __getitem__(self, session_id: str) -> GameState:
+        now = time.monotonic()
+        with self._lock:
+            last_used, state = self._data[session_id]
+            if now - last_used > self.ttl:
+                del self._data[session_id]
+                raise KeyError(session_id)
+            self._data[session_id] = (now, state)
+            self._data.move_to_end(session_id)
+            return state
+
+    def __setitem__(self, session_id: str, state: GameState) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._data[session_id] = (now, state)
+            self._data.move_to_end(session_id)
+            self._evict(now)
+
+    def __delitem__(self, session_id: str) -> None:
+        with self._lock:
+            del self._data[session_id]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _evict(self, now: float) -> None:
+        # Oldest entries are at the front, so stop at the first one still fresh
+        while self._data:
+            oldest_id, (last_used, _) = next(iter(self._data.items()))
+            if now - last_used <= self.ttl and len(self._data) <= self.maxsize:
+                break
+            del self._data[oldest_id]
+
+
 # Global session storage - all game sessions are stored here
-SESSIONS: Dict[str, GameState] = {}
+SESSIONS: SessionStore = SessionStore()
+
+# Fixed lock table: sessions share SESSION_LOCK_SHARDS locks instead of one lock each,
+# so the table never grows with the number of sessions
+_SESSION_LOCKS = tuple(asyncio.Lock() for _ in range(SESSION_LOCK_SHARDS))
+
 
+def session_lock(session_id: str) -> asyncio.Lock:
+    """
+    Returns the lock guarding changes to one session's game state.
+    
+    Inputs:
+        session_id: The game session identifier.
+    
+    What happens:
+        Hashes the session ID onto one of SESSION_LOCK_SHARDS shared locks.
+    
+    Output:
+        Returns an asyncio.Lock (use with `async with`); the same session always
+        maps to the same lock.
+    
+    Context:
+        The negotiation routes await AI calls in the middle of updating a session,
+        so two requests for the same session (e.g. a double-clicked chat message)
+        can otherwise interleave their chat history and contract updates.
+        Waiting on the lock suspends only that request, not the event loop.
+        Game routes do not take it: they never await while mutating state,
+        so they already run atomically on the event loop. Because end_game_early can
+        therefore run while a negotiation route awaits the AI, those routes check
+        state.game_over again after each AI call.
+    """
+    return _SESSION_LOCKS[hash(session_id) & (SESSION_LOCK_SHARDS - 1)]
@@ -0,0 +1,81 @@
+"""
+Request utility functions for parsing JSON request bodies.
+"""
+
+from functools import cache
+from typing import Any, Awaitable, Callable, Dict, Type, TypeVar
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def json_body(model: Type[ModelT]) -> Callable[[Request], Awaitable[ModelT]]:
+    """
+    Builds a FastAPI dependency that parses the raw request body into a schema.
+
+    Inputs:
+        model: The Pydantic request schema to validate against (e.g., OrderRequest).
+
+    What happens:
+        Reads the raw request body bytes.
+        Parses and validates them in one pass with model_validate_json (no intermediate dict).
+        Converts validation errors into FastAPI's RequestValidationError so clients
+        still receive the usual 422 response with "body" error locations.
+
+    Output:
+        Returns an async dependency function that yields a validated model instance.
+
+    Context:
+        Used with Depends() on endpoints called every round (/game/order, /game/state,
+        the negotiation routes, etc.).
+        Avoids FastAPI's default json.loads + model_validate(dict) round trip.
+        Pair with json_body_openapi() so the request body still appears in the API docs.
+    """
+    async def parse(request: Request) -> ModelT:
+        body = await request.body()
+        try:
+            return model.model_validate_json(body)
+        except ValidationError as e:
+            errors = [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ]
+            raise RequestValidationError(errors, body=body) from e
+
+    return parse
+
+
+@cache
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Builds the OpenAPI request body description for an endpoint using json_body().
+
+    Inputs:
+        model: The Pydantic request schema the endpoint expects.
+
+    What happens:
+        Generates the model's JSON schema with references pointing at the shared
+        OpenAPI components (nested schemas are already registered by response models).
+        Wraps it in an OpenAPI requestBody entry.
+        The result is cached per model, so routes sharing a request schema
+        (e.g. the chat and streaming chat routes) build it only once.
+
+    Output:
+        Returns a dictionary suitable for the route decorator's openapi_extra argument
+        (shared between callers - do not modify it).
+
+    Context:
+        Endpoints that parse their body through json_body() no longer declare a body
+        parameter, so FastAPI cannot document it automatically.
+    """
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": schema}},
+        }
+    }
@@ -10,19 +10,22 @@ This module contains:
 
 # Standard library imports
 import csv
-import json
 import random
-import statistics
 from dataclasses import dataclass, field
+from math import sqrt
+from operator import mul
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Third-party imports
+import orjson
 
 
 # ================================
 # Economic Parameters
 # ================================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EconomicParams:
     """
     Economic parameters that define the supply chain environment.
@@ -34,6 +37,8 @@ class EconomicParams:
         supplier_cost: Cost supplier pays to produce one unit (c)
         supplier_salvage_value: Value supplier gets for returned units (v_S)
         return_handling_supplier: Cost supplier pays to handle returns (h)
+
+    Frozen: one instance is shared by every session until reload_defaults() replaces it.
     """
     retail_price: float = 50.0              # p
     buyer_salvage_value: float = 3.0        # v_B
@@ -72,7 +77,7 @@ def load_economic_params_from_json(path: Path) -> EconomicParams:
         Used to customize economic environment without code changes.
     """
     try:
-        data = json.loads(path.read_text())
+        data = orjson.loads(path.read_bytes())  # Parses the bytes directly, no str decode first
     except FileNotFoundError:
         return EconomicParams()
     except Exception:
@@ -148,9 +153,11 @@ def reload_defaults() -> None:
         None (reads from global file paths).
 
     What happens:
-        Calls load_economic_params_from_json() to reload economic parameters.
-        Calls load_demand_history_from_csv() to reload demand history.
-        Updates global DEFAULT_PARAMS and DEFAULT_HISTORY variables.
+        Checks each file's modification time and size against the last load.
+        Calls load_economic_params_from_json() to reload economic parameters (if changed).
+        Calls load_demand_history_from_csv() to reload demand history (if changed).
+        Updates global DEFAULT_PARAMS and DEFAULT_HISTORY variables
+        (history is stored as a tuple so sessions can share it without copying).
         New games will use the updated configuration.
 
     Output:
@@ -161,9 +168,29 @@ def reload_defaults() -> None:
         Ensures configuration changes take effect immediately.
         Allows instructor to modify game parameters without restarting server.
     """
-    global DEFAULT_PARAMS, DEFAULT_HISTORY
-    DEFAULT_PARAMS = load_economic_params_from_json(Path("config/economic_params.json"))
-    DEFAULT_HISTORY = load_demand_history_from_csv(Path("data/D_hist.csv"))
+    global DEFAULT_PARAMS, DEFAULT_HISTORY, DEFAULT_PARAMS_STAMP, DEFAULT_HISTORY_STAMP
+    # Only re-parse a file that changed (or appeared/disappeared) since it was loaded, so
+    # saving just the parameters keeps the same history tuple (and the caches keyed on it)
+    params_stamp = _file_stamp(ECONOMIC_PARAMS_PATH)
+    if params_stamp != DEFAULT_PARAMS_STAMP:
+        DEFAULT_PARAMS_STAMP = params_stamp
+        DEFAULT_PARAMS = load_economic_params_from_json(ECONOMIC_PARAMS_PATH)
+    history_stamp = _file_stamp(DEMAND_HISTORY_PATH)
+    if history_stamp != DEFAULT_HISTORY_STAMP:
+        DEFAULT_HISTORY_STAMP = history_stamp
+        DEFAULT_HISTORY = tuple(load_demand_history_from_csv(DEMAND_HISTORY_PATH))
+
+
+def _file_stamp(path: Path) -> Tuple[int, int] | None:
+    """
+    Returns (st_mtime_ns, st_size) of a config file, or None if it cannot be read.
+    reload_defaults() compares these to skip re-parsing unchanged files.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
 
 
 def get_current_params() -> EconomicParams:
@@ -189,7 +216,7 @@ def get_current_params() -> EconomicParams:
     return DEFAULT_PARAMS
 
 
-def get_current_history() -> List[int]:
+def get_current_history() -> Tuple[int, ...]:
     """
     Gets the current demand history from memory.
 
@@ -197,11 +224,11 @@ def get_current_history() -> List[int]:
         None (reads from global DEFAULT_HISTORY).
 
     What happens:
-        Returns the global DEFAULT_HISTORY list.
+        Returns the global DEFAULT_HISTORY tuple.
         This contains the current historical demand values.
 
     Output:
-        Returns a list of integers representing historical demand values.
+        Returns a read-only tuple of integers representing historical demand values.
 
     Context:
         Called throughout the codebase to get demand history.
@@ -213,15 +240,20 @@ def get_current_history() -> List[int]:
 
 
 # Load default configuration on module import
-DEFAULT_PARAMS: EconomicParams = load_economic_params_from_json(Path("config/economic_params.json"))
-DEFAULT_HISTORY: List[int] = load_demand_history_from_csv(Path("data/D_hist.csv"))
+ECONOMIC_PARAMS_PATH = Path("config/economic_params.json")
+DEMAND_HISTORY_PATH = Path("data/D_hist.csv")
+# (st_mtime_ns, st_size) of each file when it was last loaded (None if it was missing)
+DEFAULT_PARAMS_STAMP: Tuple[int, int] | None = _file_stamp(ECONOMIC_PARAMS_PATH)
+DEFAULT_HISTORY_STAMP: Tuple[int, int] | None = _file_stamp(DEMAND_HISTORY_PATH)
+DEFAULT_PARAMS: EconomicParams = load_economic_params_from_json(ECONOMIC_PARAMS_PATH)
+DEFAULT_HISTORY: Tuple[int, ...] = tuple(load_demand_history_from_csv(DEMAND_HISTORY_PATH))
 
 
 # ================================
 # Data Classes
 # ================================
 
-@dataclass
+@dataclass(slots=True)
 class Contract:
     """
     Represents a supply chain contract between buyer and supplier.
@@ -254,7 +286,7 @@ class Contract:
             self.remaining_rounds = self.length
 
 
-@dataclass
+@dataclass(slots=True)
 class RoundInput:
     """
     Input data for simulating one round.
@@ -267,7 +299,7 @@ class RoundInput:
     realized_demand: int            # D_t
 
 
-@dataclass
+@dataclass(slots=True)
 class RoundOutput:
     """
     Complete output from simulating one round.
@@ -333,7 +365,7 @@ class RoundOutput:
     revenue_share_revenue_supplier: float = 0.0    # share * (p * S)
 
 
-@dataclass
+@dataclass(slots=True)
 class RoundSummary:
     """
     Summary of one completed round for logging and analysis.
@@ -380,7 +412,7 @@ class RoundSummary:
     revenue_share: float
 
 
-@dataclass
+@dataclass(slots=True)
 class GameState:
     """
     Complete state of a game session.
@@ -391,25 +423,32 @@ class GameState:
         contract: Current active contract
         cumulative_buyer_profit: Total profit accumulated by buyer
         cumulative_supplier_profit: Total profit accumulated by supplier
-        historical_demands: List of demand values (includes initial history + generated demands)
+        historical_demands: Demand values (includes initial history + generated demands).
+            Starts as the shared default history tuple and becomes a list on the first round.
         method: Demand generation method ("bootstrap" or "normal")
         total_demand: Sum of all demand values across rounds
         total_sales: Sum of all sales across rounds
         total_returns: Sum of all returns across rounds
         total_leftovers: Sum of all leftovers across rounds
+        demand_sum, demand_sq_sum: Running sum and sum of squares of historical_demands
+            (None / 0 until the first "normal" round), so the mean and stdev need no pass
+            over the history
         round_summaries: List of RoundSummary objects for each completed round
+        round_summary_data: API-layer copies of round_summaries (RoundSummaryData), filled in lazily
         negotiation_chat_history: List of chat messages during current negotiation
         negotiation_draft_contract: Draft contract from negotiation chat (if any)
         initial_contract_type: Contract type from initial proposal (cannot be changed)
-        negotiation_history: List of completed negotiation sessions
+        negotiation_history: List of completed negotiation sessions (NegotiationHistory records built by the API layer)
+        negotiation_start_time: ISO timestamp when the current negotiation started (if any)
         ended_early: Flag indicating if game was ended early by instructor
+        summary_json: Serialized end-of-game summary, cached by the API layer once the game is over
     """
     round_number: int
     total_rounds: int
     contract: Contract
     cumulative_buyer_profit: float
     cumulative_supplier_profit: float
-    historical_demands: List[int]
+    historical_demands: List[int] | Tuple[int, ...]
     method: str = "bootstrap"
 
     # Aggregates for end-of-game summary
@@ -418,7 +457,14 @@ class GameState:
     total_returns: int = 0
     total_leftovers: int = 0
 
+    # Running sum and sum of squares of historical_demands for "normal" demand
+    # (filled in on the first round, then updated as demands are appended)
+    demand_sum: int | None = None
+    demand_sq_sum: int = 0
+
     round_summaries: List[RoundSummary] = field(default_factory=list)
+    # Completed rounds never change, so each is converted for the API only once
+    round_summary_data: List[Any] = field(default_factory=list)
 
     # Negotiation state
     negotiation_chat_history: List[Dict[str, str]] = field(default_factory=list)
@@ -426,11 +472,15 @@ class GameState:
     initial_contract_type: str | None = None
 
     # Storage for completed negotiations (for logging and analysis)
-    negotiation_history: List[Dict[str, Any]] = field(default_factory=list)
+    negotiation_history: List[Any] = field(default_factory=list)
+    negotiation_start_time: str | None = None
 
     # Flag to mark if game was ended early by instructor
     ended_early: bool = False
 
+    # Finished games no longer change, so the summary is built once and reused
+    summary_json: str | None = None
+
     def is_contract_expired(self) -> bool:
         """
         Checks if the current contract has expired.
@@ -450,6 +500,28 @@ class GameState:
         """
         return self.contract.remaining_rounds <= 0
 
+    @property
+    def game_over(self) -> bool:
+        """
+        Whether the game has ended: the last round is played or the instructor ended it early.
+
+        Context:
+            Read by every game and negotiation route before allowing an action, and by the
+            response converters. A property instead of a stored flag, so it can never go
+            stale when round_number or ended_early change.
+        """
+        return self.round_number > self.total_rounds or self.ended_early
+
+    @property
+    def has_active_contract(self) -> bool:
+        """
+        Whether the current contract still has rounds left (remaining_rounds > 0).
+
+        Context:
+            Checked before negotiating a new contract.
+        """
+        return self.contract.remaining_rounds > 0
+
 
 # ================================
 # Simulation Functions
@@ -707,7 +779,7 @@ def simulate_round(contract: Contract, round_input: RoundInput) -> RoundOutput:
     )
 
 
-def simulate_game_round(state: GameState, order_quantity: int) -> tuple[RoundOutput, GameState]:
+def simulate_game_round(state: GameState, order_quantity: int) -> RoundOutput:
     """
     Simulates one complete game round including demand generation and state updates.
 
@@ -717,18 +789,19 @@ def simulate_game_round(state: GameState, order_quantity: int) -> tuple[RoundOut
 
     What happens:
         Generates demand using historical data and configured method (bootstrap/normal).
-        Adds generated demand to session's historical_demands list.
+        Adds generated demand to session's historical_demands (copying the shared
+        default history into a list the first time).
+        For the normal method, keeps state.demand_sum / demand_sq_sum up to date.
         Creates RoundInput with order quantity and realized demand.
         Calls simulate_round() to calculate round results.
         Updates cumulative profits (buyer and supplier).
         Updates aggregate statistics (total_demand, total_sales, total_returns, total_leftovers).
         Creates RoundSummary and adds it to state.round_summaries.
         Increments state.round_number by 1.
+        All updates are applied to the passed-in state in place.
 
     Output:
-        Returns a tuple of (RoundOutput, GameState):
-        - RoundOutput: Detailed results from this round
-        - GameState: Updated game state with new round and aggregates
+        Returns a RoundOutput with the detailed results from this round.
 
     Context:
         Main game round simulation function.
@@ -737,10 +810,23 @@ def simulate_game_round(state: GameState, order_quantity: int) -> tuple[RoundOut
         Updates all game state including profits, aggregates, and round history.
     """
     # Generate demand for this round
-    D = generate_demand(state.historical_demands, method=state.method)
+    totals = None
+    if state.method == "normal":
+        if state.demand_sum is None:
+            # One pass over the starting history; later rounds update the totals in O(1)
+            state.demand_sum = sum(state.historical_demands)
+            state.demand_sq_sum = sum(map(mul, state.historical_demands, state.historical_demands))
+        totals = (state.demand_sum, state.demand_sq_sum)
+    D = generate_demand(state.historical_demands, method=state.method, totals=totals)
 
     # Add generated demand to session's history
+    # (new sessions share the default history tuple - take a private list copy on first append)
+    if isinstance(state.historical_demands, tuple):
+        state.historical_demands = list(state.historical_demands)
     state.historical_demands.append(D)
+    if state.demand_sum is not None:
+        state.demand_sum += D
+        state.demand_sq_sum += D * D
 
     # Package round input
     round_input = RoundInput(order_quantity=order_quantity, realized_demand=D)
@@ -784,22 +870,28 @@ def simulate_game_round(state: GameState, order_quantity: int) -> tuple[RoundOut
 
     # Increment round number for next round
     state.round_number += 1
-    return round_output, state
+    return round_output
 
 
-def generate_demand(historical_demands: List[int], method: str = "bootstrap") -> int:
+def generate_demand(
+    historical_demands: Sequence[int],
+    method: str = "bootstrap",
+    totals: Tuple[int, int] | None = None,
+) -> int:
     """
     Generates a random demand value for one round.
 
     Inputs:
-        historical_demands: List of historical demand values to use for generation.
+        historical_demands: Sequence of historical demand values to use for generation.
         method: "bootstrap" (sample from history) or "normal" (normal distribution).
+        totals: Optional precomputed (sum, sum of squares) of historical_demands for
+            "normal"; computed here when not given.
 
     What happens:
         If method is "bootstrap":
             - Randomly selects one value from historical_demands list.
         If method is "normal":
-            - Calculates mean and standard deviation from historical_demands.
+            - Calculates mean and standard deviation from the sum and sum of squares.
             - Generates a random value from normal distribution with those parameters.
             - Ensures value is non-negative (clamps to 0 if negative).
         If method is invalid, raises ValueError.
@@ -817,8 +909,13 @@ def generate_demand(historical_demands: List[int], method: str = "bootstrap") ->
         return random.choice(historical_demands)
 
     elif method == "normal":
-        mean = statistics.mean(historical_demands)
-        stdev = statistics.stdev(historical_demands) if len(historical_demands) > 1 else 1
+        count = len(historical_demands)
+        if totals is None:
+            totals = (sum(historical_demands), sum(map(mul, historical_demands, historical_demands)))
+        total, total_sq = totals
+        mean = total / count
+        # Demands are ints, so the numerator is exact (no floating-point cancellation)
+        stdev = sqrt((count * total_sq - total * total) / (count * (count - 1))) if count > 1 else 1
         return max(0, int(random.gauss(mean, stdev)))
 
     else:
@@ -855,7 +952,7 @@ if __name__ == "__main__":
     print("Starting standalone game simulation...\n")
 
     for _ in range(3):
-        out, state = simulate_game_round(state, order_quantity=100)
+        out = simulate_game_round(state, order_quantity=100)
         print(f"Round {state.round_number - 1}:")
         print(out)
         print("Remaining contract rounds:", state.contract.remaining_rounds)
@@ -491,25 +491,89 @@ document.addEventListener("DOMContentLoaded", () => {
         const text = await response.text(); // Read body once
 
         if (!response.ok) {
-            let detail = text;
-            try {
-                const parsed = JSON.parse(text);
-                if (typeof parsed.detail === "string") {
-                    detail = parsed.detail;
-                } else if (parsed.detail !== undefined) {
-                    detail = JSON.stringify(parsed.detail);
-                }
-            } catch {
-                // Not JSON, keep raw text
-            }
-
-            throw new Error(`HTTP ${response.status}: ${detail}`);
+            throw httpError(response.status, text);
         }
 
         if (!text) return null;
         return JSON.parse(text);
     }
 
+    /**
+     * Builds an Error for a failed API response.
+     * 
+     * Inputs:
+     * - status: HTTP status code
+     * - text: Raw response body
+     * 
+     * What happens:
+     * - Tries to extract the "detail" field from a JSON error body
+     * - Joins validation error messages (422) into one readable line
+     * 
+     * Output:
+     * Returns an Error with HTTP status and detail message
+     */
+    function httpError(status, text) {
+        let detail = text;
+        try {
+            const parsed = JSON.parse(text);
+            if (typeof parsed.detail === "string") {
+                detail = parsed.detail;
+            } else if (Array.isArray(parsed.detail)) {
+                // Validation errors (422): show each message
+                detail = parsed.detail.map((e) => e.msg).join("; ");
+            } else if (parsed.detail !== undefined) {
+                detail = JSON.stringify(parsed.detail);
+            }
+        } catch {
+            // Not JSON, keep raw text
+        }
+        return new Error(`HTTP ${status}: ${detail}`);
+    }
+
+    /**
+     * Reads a Server-Sent Events (SSE) stream from an API endpoint.
+     * 
+     * Inputs:
+     * - url: API endpoint URL
+     * - options: Fetch options (method, headers, body, etc.)
+     * - onEvent: Called with each parsed "data:" JSON payload as it arrives
+     * 
+     * What happens:
+     * - Makes fetch request and reads the body incrementally
+     * - Splits it into events (separated by blank lines)
+     * - Parses each event's data as JSON and passes it to onEvent
+     * 
+     * Throws:
+     * Error with HTTP status and detail message if request fails
+     */
+    async function fetchEventStream(url, options, onEvent) {
+        const response = await fetch(url, options);
+        if (!response.ok) {
+            throw httpError(response.status, await response.text());
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                const data = rawEvent
+                    .split("\n")
+                    .filter((line) => line.startsWith("data: "))
+                    .map((line) => line.slice(6))
+                    .join("\n");
+                if (data) onEvent(JSON.parse(data));
+            }
+        }
+    }
+
     // ================================
     // Phase-Aware UI Functions
     // ================================
@@ -1121,6 +1185,9 @@ document.addEventListener("DOMContentLoaded", () => {
      * - Creates styled message div
      * - Appends message to chat container
      * - Scrolls chat to bottom to show latest message
+     * 
+     * Output:
+     * Returns the message text element (so streamed replies can be filled in)
      */
     function addChatMessage(role, content) {
         const chatMessages = document.getElementById("chat-messages");
@@ -1143,6 +1210,7 @@ document.addEventListener("DOMContentLoaded", () => {
         
         chatMessages.appendChild(messageDiv);
         chatMessages.scrollTop = chatMessages.scrollHeight;
+        return contentSpan;
     }
     
     /**
@@ -1340,18 +1408,32 @@ document.addEventListener("DOMContentLoaded", () => {
                 chatInput.value = "";
                 
                 addChatMessage("student", message);
+                let supplierSpan = null;
                 
                 try {
-                    const data = await fetchJsonWithDetail(`${BASE_URL}/game/negotiate/chat`, {
+                    // Stream the supplier reply so text appears as the AI writes it
+                    let data = null;
+                    await fetchEventStream(`${BASE_URL}/game/negotiate/chat/stream`, {
                         method: "POST",
                         headers: { "Content-Type": "application/json" },
                         body: JSON.stringify({
                             session_id: sessionId,
                             message: message
                         }),
+                    }, (event) => {
+                        if (!supplierSpan) supplierSpan = addChatMessage("supplier", "");
+                        if (event.delta !== undefined) {
+                            supplierSpan.textContent += event.delta;
+                        } else if (event.error) {
+                            // Game ended or a new negotiation started while the reply streamed
+                            throw new Error(event.error);
+                        } else if (event.final) {
+                            // Final event carries the cleaned message and any draft contract
+                            data = event.final;
+                            supplierSpan.textContent = data.supplier_message;
+                        }
                     });
-                    
-                    addChatMessage("supplier", data.supplier_message);
+                    if (!data) throw new Error("Chat stream ended without a reply");
                     
                     // If draft contract is provided, show it as an offer
                     if (data.negotiation_draft_contract) {
@@ -1361,7 +1443,12 @@ document.addEventListener("DOMContentLoaded", () => {
                     
                 } catch (err) {
                     console.error(err);
-                    addChatMessage("supplier", "I'm having trouble processing that. Could you rephrase?");
+                    const fallbackText = "I'm having trouble processing that. Could you rephrase?";
+                    if (supplierSpan) {
+                        supplierSpan.textContent = fallbackText;
+                    } else {
+                        addChatMessage("supplier", fallbackText);
+                    }
                     addNotification("Chat error: " + err.message, "error");
                 }
             });